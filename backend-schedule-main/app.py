@@ -8,6 +8,7 @@ from routes.user_routes import user_bp
 from routes.task_routes import task_bp
 from routes.constraint_routes import constraint_bp
 from routes.schedule_routes import schedule_bp
+from services.schedule_job_service import ScheduleJobService
 
 def create_app():
     app = Flask(__name__)
@@ -24,6 +25,9 @@ def create_app():
     app.register_blueprint(task_bp)
     app.register_blueprint(constraint_bp)
     app.register_blueprint(schedule_bp)
+
+    # Generation jobs orphaned by a previous process
+    ScheduleJobService.recover_jobs()
     
     # Health check endpoint
     @app.route('/api/health', methods=['GET'])
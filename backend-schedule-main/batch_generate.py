@@ -0,0 +1,48 @@
+"""
+Regenerate every user's weekly schedule in parallel.
+
+    python batch_generate.py                     # all users, one worker per core
+    python batch_generate.py --workers 8 --chunk-size 500
+    python batch_generate.py --users 1 2 3
+"""
+import argparse
+import json
+import logging
+import sys
+
+from services.batch_schedule_service import BatchScheduleService
+
+
+def _print_progress(stats):
+    print(
+        f"[{stats['done']}/{stats['total']}] "
+        f"ok={stats['succeeded']} failed={stats['failed']} "
+        f"rows={stats['rows_written']} elapsed={stats['elapsed_s']}s",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Regenerate weekly schedules for all users")
+    parser.add_argument("--workers", type=int, default=None, help="solver processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=200, help="users loaded/written per batch")
+    parser.add_argument("--users", type=int, nargs="*", help="only these user ids")
+    parser.add_argument("--solve-timeout", type=float, default=120, help="seconds before a user's solve is given up")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+
+    stats = BatchScheduleService.regenerate_all(
+        user_ids=args.users,
+        workers=args.workers,
+        chunk_size=args.chunk_size,
+        progress=_print_progress,
+        solve_timeout_s=args.solve_timeout,
+    )
+    print(json.dumps(stats, indent=2))
+    return 0 if not stats["errors"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Assert that the schedule read paths issue a constant number of queries.
+
+    cd backend-schedule-main
+    python -m benchmarks.query_counts                       # in-memory SQLite
+    python -m benchmarks.query_counts --sizes 10 100 1000
+    python -m benchmarks.query_counts --database-url postgresql://...   # scratch DB only!
+
+Seeds one user with N tasks and N schedule rows for every size, runs each
+read (weekly, by user, today, one day, conflicts) under a QueryCounter and
+fails if any of them executes more than EXPECTED_QUERIES statements, so an
+N+1 lazy load shows up as a count that grows with N.
+"""
+import argparse
+import sys
+from datetime import time
+
+from sqlalchemy import create_engine, insert
+from sqlalchemy.pool import StaticPool
+
+from core.database import SessionLocal
+from core.query_counter import QueryCounter
+from models.base import Base
+from models.constraint_global_model import GlobalConstraint  # noqa: F401 (table registration)
+from models.constraint_task_model import TaskConstraint  # noqa: F401
+from models.schedule_model import Schedule
+from models.task_model import Task
+from models.user_model import User
+from services.schedule_service import ScheduleService
+
+DAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# One joined projection query per read
+EXPECTED_QUERIES = 1
+
+READS = {
+    "weekly": lambda user_id: ScheduleService.get_user_weekly_schedule(user_id),
+    "by_user": lambda user_id: ScheduleService.get_schedule_by_id(user_id),
+    "today": lambda user_id: ScheduleService.get_today_schedule(user_id),
+    "day": lambda user_id: ScheduleService.get_day_schedule(user_id, "monday"),
+    "conflicts": lambda user_id: ScheduleService.check_scheduling_conflicts(user_id),
+}
+
+
+def seed(session, user_id, size):
+    """One user with size tasks, each scheduled once, spread over the week"""
+    session.add(User(id=user_id, name=f"user{user_id}", email=f"user{user_id}@example.com", password_hash="x"))
+    session.flush()
+
+    first_task_id = user_id * 100000
+    session.execute(insert(Task), [
+        {"id": first_task_id + i, "user_id": user_id, "name": f"task {i}", "mode": "duration", "duration_minutes": 30}
+        for i in range(size)
+    ])
+    session.execute(insert(Schedule), [
+        {
+            "user_id": user_id,
+            "task_id": first_task_id + i,
+            "day": DAYS[i % len(DAYS)],
+            "start_time": time(6 + (i // len(DAYS)) % 16, 0),
+            "end_time": time(6 + (i // len(DAYS)) % 16, 30),
+        }
+        for i in range(size)
+    ])
+    session.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query counts of the schedule read paths")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[5, 50, 500])
+    parser.add_argument("--database-url", default="sqlite://",
+                        help="tables are created and rows inserted here (default: in-memory SQLite)")
+    args = parser.parse_args()
+
+    engine = create_engine(args.database_url, poolclass=StaticPool,
+                           **({"connect_args": {"check_same_thread": False}} if args.database_url.startswith("sqlite") else {}))
+    Base.metadata.create_all(engine)
+    SessionLocal.configure(bind=engine)
+
+    failures = 0
+    print(f"{'read':<10} " + " ".join(f"{f'n={size}':>8}" for size in args.sizes))
+    counts = {name: [] for name in READS}
+
+    for user_id, size in enumerate(args.sizes, start=1):
+        session = SessionLocal()
+        try:
+            seed(session, user_id, size)
+        finally:
+            session.close()
+
+        for name, read in READS.items():
+            with QueryCounter(engine) as queries:
+                read(user_id)
+            counts[name].append(queries.count)
+            if queries.count > EXPECTED_QUERIES:
+                failures += 1
+
+    for name, row in counts.items():
+        print(f"{name:<10} " + " ".join(f"{count:>8}" for count in row))
+
+    if failures:
+        print(f"FAIL: {failures} read(s) issued more than {EXPECTED_QUERIES} query", file=sys.stderr)
+        return 1
+    print(f"OK: every read issued at most {EXPECTED_QUERIES} query")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,151 @@
+"""
+Run every registered solver engine over synthetic workloads.
+
+    cd backend-schedule-main
+    python -m benchmarks.run_solvers                        # all scenarios, all engines
+    python -m benchmarks.run_solvers --scenarios tiny medium --engines greedy backtrack
+    python -m benchmarks.run_solvers --output bench.json    # machine-readable results
+    python -m benchmarks.run_solvers --engines greedy optimal   # assignment vs greedy
+
+For each (scenario, engine) it reports the best wall time over --repeat
+runs, peak traced memory (from a separate tracemalloc run, so tracing
+doesn't skew the timing), tasks placed, failed tasks, and the total slot
+score of the placed flex tasks, computed with the same scalar heuristic
+for every engine so quality is comparable. The JSON output carries the
+git commit so runs from different commits can be diffed.
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import date, datetime
+
+import numpy as np
+
+from benchmarks.workload import SCENARIOS, scenario
+from services.csp_solver_v2 import SOLVER_VERSION, CSPScheduler
+from services.solver_engine import available_engines, get_engine, normalize_input
+from services.solver_time import to_minutes
+
+# Engines too slow for the big scenarios: skipped above this many tasks
+# unless --all-sizes is given
+SLOW_ENGINE_LIMITS = {"legacy": 1000}
+
+
+def run_one(engine_name, tasks, global_constraints, repeat=3, time_budget_ms=None, now=None):
+    """Benchmark one engine on one workload; now fixes the deadline reference"""
+    tasks, global_constraints = normalize_input(tasks, global_constraints)
+
+    timings = []
+    result = None
+    for _ in range(repeat):
+        engine = get_engine(engine_name, time_budget_ms=time_budget_ms, now=now)
+        started = time.perf_counter()
+        result = engine.solve(tasks, global_constraints)
+        timings.append((time.perf_counter() - started) * 1000)
+
+    tracemalloc.start()
+    get_engine(engine_name, time_budget_ms=time_budget_ms, now=now).solve(tasks, global_constraints)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    placed = sum(len(entries) for entries in result["schedule"].values())
+    return {
+        "wall_ms_min": round(min(timings), 3),
+        "wall_ms_median": round(statistics.median(timings), 3),
+        "peak_kib": round(peak / 1024, 1),
+        "tasks": len(tasks),
+        "placed": placed,
+        "failed": len(result["failed_tasks"]),
+        "score": round(total_score(tasks, result["schedule"], now), 1),
+    }
+
+
+def total_score(tasks, schedule, now=None):
+    """Sum of the scalar slot score over every placed flex task"""
+    scorer = CSPScheduler(now=now)
+    tasks_by_id = {t["id"]: t for t in tasks}
+    total = 0.0
+    for day, entries in schedule.items():
+        if day not in scorer.days:
+            continue
+        for entry in entries:
+            task = tasks_by_id.get(entry["task_id"])
+            if task is None or task["mode"] != "duration":
+                continue
+            start, end = to_minutes(entry["start"]), to_minutes(entry["end"])
+            total += scorer._calculate_slot_score(task, day, start, end)
+    return total
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark solver engines on synthetic workloads")
+    parser.add_argument("--scenarios", nargs="*", default=list(SCENARIOS), choices=list(SCENARIOS))
+    parser.add_argument("--engines", nargs="*", default=available_engines(), choices=available_engines())
+    parser.add_argument("--seeds", type=int, default=1, help="users generated per scenario")
+    parser.add_argument("--repeat", type=int, default=3, help="timed runs per (scenario, engine, seed)")
+    parser.add_argument("--time-budget-ms", type=int, default=200, help="budget for the anytime engine")
+    parser.add_argument("--anchor", default=None, help="YYYY-MM-DD used for deadlines (default today)")
+    parser.add_argument("--all-sizes", action="store_true", help="don't skip slow engines on big scenarios")
+    parser.add_argument("--output", help="write JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    anchor = date.fromisoformat(args.anchor) if args.anchor else date.today()
+    now = datetime.combine(anchor, datetime.min.time())
+    results = []
+    for name in args.scenarios:
+        for seed in range(args.seeds):
+            tasks, global_constraints = scenario(name, seed=seed, anchor=anchor)
+            for engine_name in args.engines:
+                limit = SLOW_ENGINE_LIMITS.get(engine_name)
+                if limit is not None and len(tasks) > limit and not args.all_sizes:
+                    print(f"{name:>7} seed={seed} {engine_name:>9}: skipped (> {limit} tasks)", file=sys.stderr)
+                    continue
+                row = run_one(
+                    engine_name, tasks, global_constraints,
+                    repeat=args.repeat, time_budget_ms=args.time_budget_ms, now=now,
+                )
+                row = {"scenario": name, "seed": seed, "engine": engine_name, **row}
+                results.append(row)
+                print(
+                    f"{name:>7} seed={seed} {engine_name:>9}: {row['wall_ms_min']:>10.1f} ms "
+                    f"{row['peak_kib']:>9.0f} KiB  placed={row['placed']} "
+                    f"failed={row['failed']} score={row['score']}",
+                    file=sys.stderr,
+                    flush=True,
+                )
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "solver_version": SOLVER_VERSION,
+            "anchor_date": anchor.isoformat(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "timestamp": int(time.time()),
+        },
+        "results": results,
+    }
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
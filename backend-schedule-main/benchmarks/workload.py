@@ -0,0 +1,121 @@
+"""
+Synthetic solver workloads.
+
+generate_user() builds one user's solver input in the same shape
+ScheduleService._build_solver_tasks() produces from the database: tasks
+with "HH:MM" times, preferred times, difficulty, deadlines relative to
+the anchor date, and task/global constraints from the existing type
+vocabularies. Everything is driven by a seeded Random, so the same
+(scenario, seed, anchor) always gives the same input.
+"""
+import random
+from datetime import date, timedelta
+
+from services.solver_time import to_label
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday"]
+PREFERRED_TIMES = ["morning", "afternoon", "evening", "night"]
+CATEGORIES = ["study", "work", "health", "personal"]
+
+# name -> (task count, share of fixed tasks)
+SCENARIOS = {
+    "tiny": (5, 0.4),
+    "small": (25, 0.3),
+    "medium": (100, 0.2),
+    "large": (500, 0.1),
+    "xlarge": (1000, 0.05),
+    "huge": (5000, 0.02),
+}
+
+
+def generate_user(n_tasks, seed=0, fixed_ratio=0.2, deadline_ratio=0.4,
+                  constraint_ratio=0.3, anchor=None):
+    """Return (tasks, global_constraints) for one synthetic user"""
+    rnd = random.Random(seed)
+    anchor = anchor or date.today()
+
+    n_fixed = int(round(n_tasks * fixed_ratio))
+    tasks = [_fixed_task(rnd, i + 1) for i in range(n_fixed)]
+    tasks += [
+        _flex_task(rnd, n_fixed + i + 1, anchor, deadline_ratio, constraint_ratio)
+        for i in range(n_tasks - n_fixed)
+    ]
+    return tasks, _global_constraints(rnd)
+
+
+def scenario(name, seed=0, anchor=None):
+    n_tasks, fixed_ratio = SCENARIOS[name]
+    return generate_user(n_tasks, seed=seed, fixed_ratio=fixed_ratio, anchor=anchor)
+
+
+def _fixed_task(rnd, task_id):
+    start = rnd.randrange(7 * 60, 20 * 60, 30)
+    length = rnd.choice([60, 90, 120])
+    return {
+        "id": task_id,
+        "name": f"class-{task_id}",
+        "mode": "fixed",
+        "day": rnd.choice(WEEKDAYS[:5]),
+        "start_time": to_label(start),
+        "end_time": to_label(start + length),
+        "duration": None,
+        "category": "study",
+        "difficulty": rnd.randint(1, 5),
+        "priority": 5,
+        "preferred_time": [],
+        "constraints": [],
+    }
+
+
+def _flex_task(rnd, task_id, anchor, deadline_ratio, constraint_ratio):
+    task = {
+        "id": task_id,
+        "name": f"task-{task_id}",
+        "mode": "duration",
+        "day": None,
+        "start_time": None,
+        "end_time": None,
+        "duration": rnd.choice([30, 45, 60, 60, 90, 120]),
+        "category": rnd.choice(CATEGORIES),
+        "difficulty": rnd.randint(1, 5),
+        "priority": rnd.randint(1, 5),
+        "preferred_time": rnd.sample(PREFERRED_TIMES, rnd.choice([0, 1, 1, 2])),
+        "constraints": [],
+    }
+
+    if rnd.random() < deadline_ratio:
+        task["deadline"] = {
+            "date": (anchor + timedelta(days=rnd.randint(0, 13))).isoformat(),
+            "time": "23:59",
+        }
+
+    if rnd.random() < constraint_ratio:
+        task["constraints"].append(_task_constraint(rnd, task["duration"]))
+
+    return task
+
+
+def _task_constraint(rnd, duration):
+    ctype = rnd.choice(["must_morning", "must_afternoon", "must_evening", "fixed_day", "fixed_time"])
+    if ctype == "fixed_day":
+        value = {"day": rnd.choice(WEEKDAYS)}
+    elif ctype == "fixed_time":
+        start = rnd.randrange(8 * 60, 21 * 60, 30)
+        value = {"start": to_label(start), "end": to_label(min(start + duration, 24 * 60))}
+    else:
+        value = {}
+    return {"type": ctype, "value": value, "priority": rnd.randint(1, 5)}
+
+
+def _global_constraints(rnd):
+    constraints = [
+        {"type": "min_start_time", "value": {"time": rnd.choice(["06:00", "07:00", "08:00"])}, "priority": 5},
+        {"type": "max_end_time", "value": {"time": rnd.choice(["22:00", "23:00", "23:30"])}, "priority": 5},
+    ]
+    if rnd.random() < 0.5:
+        constraints.append({"type": "disallowed_days", "value": ["saturday"], "priority": 3})
+    if rnd.random() < 0.5:
+        constraints.append({"type": "max_daily_duration", "value": {"hours": rnd.choice([6, 8, 10])}, "priority": 3})
+    if rnd.random() < 0.5:
+        constraints.append({"type": "max_tasks_per_day", "value": {"count": rnd.choice([4, 6, 8])}, "priority": 3})
+    return constraints
@@ -7,3 +7,32 @@ class Config:
     )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     SECRET_KEY = os.getenv("SECRET_KEY", "supersecretkey")
+
+    # Solver result cache (LRU size; optional directory for the on-disk tier
+    # and the most files it keeps)
+    SOLVER_CACHE_SIZE = int(os.getenv("SOLVER_CACHE_SIZE", "256"))
+    SOLVER_CACHE_DIR = os.getenv("SOLVER_CACHE_DIR") or None
+    SOLVER_CACHE_DISK_SIZE = int(os.getenv("SOLVER_CACHE_DISK_SIZE", "4096"))
+
+    # Default solver engine (see services/solver_engine.py)
+    SOLVER_ENGINE = os.getenv("SOLVER_ENGINE", "greedy")
+
+    # Solver grid granularity in minutes (5 / 15 / 30)
+    SOLVER_SLOT_MINUTES = int(os.getenv("SOLVER_SLOT_MINUTES", "30"))
+
+    # Solver horizon in weeks: 1 = named weekdays; more = ISO-dated days from today
+    SOLVER_HORIZON_WEEKS = int(os.getenv("SOLVER_HORIZON_WEEKS", "1"))
+
+    # Worker processes for the portfolio engine (empty = one per CPU)
+    SOLVER_PORTFOLIO_WORKERS = int(os.getenv("SOLVER_PORTFOLIO_WORKERS") or 0) or None
+
+    # Background schedule generation jobs: worker threads, how often a
+    # running job's heartbeat is refreshed, and how long it may go without
+    # one before it counts as dead (keep that many heartbeats long)
+    SCHEDULE_JOB_WORKERS = int(os.getenv("SCHEDULE_JOB_WORKERS", "2"))
+    SCHEDULE_JOB_HEARTBEAT_SECONDS = float(os.getenv("SCHEDULE_JOB_HEARTBEAT_SECONDS", "30"))
+    SCHEDULE_JOB_STALE_SECONDS = int(os.getenv("SCHEDULE_JOB_STALE_SECONDS", "900"))
+
+    # Per-user read cache for schedule/task/constraint getters (entries; seconds)
+    READ_CACHE_SIZE = int(os.getenv("READ_CACHE_SIZE", "2048"))
+    READ_CACHE_TTL_SECONDS = float(os.getenv("READ_CACHE_TTL_SECONDS", "30"))
@@ -0,0 +1,38 @@
+"""
+Count the SQL statements an engine executes inside a block.
+
+    with QueryCounter() as queries:
+        ScheduleService.get_user_weekly_schedule(user_id)
+    assert queries.count == 1, queries.statements
+
+Hooks the engine's before_cursor_execute event, so it sees every
+statement regardless of which session or connection issued it. Used by
+benchmarks/query_counts.py to catch N+1 regressions in read paths.
+"""
+from sqlalchemy import event
+
+from core.database import SessionLocal
+
+
+class QueryCounter:
+
+    def __init__(self, bind=None):
+        # Default: whatever engine SessionLocal is bound to right now
+        self.bind = bind if bind is not None else SessionLocal.kw["bind"]
+        self.statements = []
+
+    @property
+    def count(self):
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    def __enter__(self):
+        self.statements = []
+        event.listen(self.bind, "before_cursor_execute", self._record)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.bind, "before_cursor_execute", self._record)
+        return False
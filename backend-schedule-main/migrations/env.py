@@ -9,6 +9,8 @@ from models.user_model import User
 from models.task_model import Task
 from models.constraint_task_model import TaskConstraint
 from models.constraint_global_model import GlobalConstraint
+from models.schedule_model import Schedule
+from models.schedule_job_model import ScheduleJob
 
 # this is the Alembic Config object
 config = context.config
@@ -0,0 +1,62 @@
+"""add schedule_jobs
+
+Revision ID: 4b7e2d91c3a5
+Revises: 911bc9eaaab9
+Create Date: 2026-10-18 09:12:40.518302
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e2d91c3a5"
+down_revision: Union[str, Sequence[str], None] = "911bc9eaaab9"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "schedule_jobs",
+        sa.Column("id", sa.Integer(), nullable=False),
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("status", sa.String(length=20), nullable=False),
+        sa.Column("progress", sa.Integer(), nullable=False),
+        sa.Column("options", sa.JSON(), nullable=True),
+        sa.Column("result", sa.JSON(), nullable=True),
+        sa.Column("error", sa.Text(), nullable=True),
+        sa.Column("created_at", sa.DateTime(), nullable=True),
+        sa.Column("started_at", sa.DateTime(), nullable=True),
+        sa.Column("heartbeat_at", sa.DateTime(), nullable=True),
+        sa.Column("finished_at", sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["user_id"],
+            ["users.id"],
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    # Dedup lookup: the user's in-flight job
+    op.create_index(
+        "ix_schedule_jobs_user_id_status", "schedule_jobs", ["user_id", "status"]
+    )
+    # Dedup guarantee: one queued/running job per user
+    op.create_index(
+        "ux_schedule_jobs_user_id_in_flight",
+        "schedule_jobs",
+        ["user_id"],
+        unique=True,
+        postgresql_where=sa.text("status IN ('queued', 'running')"),
+        sqlite_where=sa.text("status IN ('queued', 'running')"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ux_schedule_jobs_user_id_in_flight", table_name="schedule_jobs")
+    op.drop_index("ix_schedule_jobs_user_id_status", table_name="schedule_jobs")
+    op.drop_table("schedule_jobs")
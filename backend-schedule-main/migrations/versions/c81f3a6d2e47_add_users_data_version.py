@@ -0,0 +1,32 @@
+"""add users.data_version
+
+Revision ID: c81f3a6d2e47
+Revises: 4b7e2d91c3a5
+Create Date: 2026-10-18 14:03:11.204519
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c81f3a6d2e47"
+down_revision: Union[str, Sequence[str], None] = "4b7e2d91c3a5"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column(
+        "users",
+        sa.Column("data_version", sa.Integer(), nullable=False, server_default="0"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("users", "data_version")
@@ -0,0 +1,53 @@
+"""add indexes for schedule, task and constraint reads
+
+Revision ID: e5a09c4b7f12
+Revises: c81f3a6d2e47
+Create Date: 2026-10-18 16:40:27.830115
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5a09c4b7f12"
+down_revision: Union[str, Sequence[str], None] = "c81f3a6d2e47"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, covering columns) - keep in sync with the models' __table_args__
+INDEXES = [
+    # Weekly/day reads: WHERE user_id [AND day] ORDER BY day, start_time, id
+    ("ix_schedules_user_id_day_start_time", "schedules",
+     ["user_id", "day", "start_time", "id"], ["task_id", "end_time"]),
+    ("ix_schedules_task_id", "schedules", ["task_id"], None),
+    ("ix_tasks_user_id_mode", "tasks", ["user_id", "mode"], None),
+    ("ix_tasks_user_id_deadline_day", "tasks", ["user_id", "deadline_day", "deadline_time"], None),
+    ("ix_constraints_task_task_id", "constraints_task", ["task_id"], None),
+    ("ix_constraints_global_user_id", "constraints_global", ["user_id"], None),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY (PostgreSQL) keeps the tables writable while the
+    # indexes build; it cannot run inside a transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, include in INDEXES:
+            op.create_index(
+                name, table, columns,
+                postgresql_include=include or [],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -4,6 +4,9 @@ from models.base import Base
 
 class GlobalConstraint(Base):
     __tablename__ = "constraints_global"
+    __table_args__ = (
+        db.Index("ix_constraints_global_user_id", "user_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
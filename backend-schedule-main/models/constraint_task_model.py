@@ -4,6 +4,9 @@ from models.base import Base
 
 class TaskConstraint(Base):
     __tablename__ = "constraints_task"
+    __table_args__ = (
+        db.Index("ix_constraints_task_task_id", "task_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     task_id = db.Column(db.Integer, db.ForeignKey("tasks.id"), nullable=False)
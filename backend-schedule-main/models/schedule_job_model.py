@@ -0,0 +1,35 @@
+from core.database import db
+from datetime import datetime
+from models.base import Base
+
+class ScheduleJob(Base):
+    __tablename__ = "schedule_jobs"
+    __table_args__ = (
+        db.Index("ix_schedule_jobs_user_id_status", "user_id", "status"),
+        # At most one queued/running job per user, across all processes
+        db.Index(
+            "ux_schedule_jobs_user_id_in_flight", "user_id",
+            unique=True,
+            postgresql_where=db.text("status IN ('queued', 'running')"),
+            sqlite_where=db.text("status IN ('queued', 'running')"),
+        ),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+
+    # queued -> running -> succeeded / failed
+    status = db.Column(db.String(20), nullable=False, default="queued")
+    progress = db.Column(db.Integer, nullable=False, default=0)   # 0–100
+
+    # generate options (engine, time_budget_ms)
+    options = db.Column(db.JSON)
+    result = db.Column(db.JSON)
+    error = db.Column(db.Text)
+
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)
+    # Refreshed by the worker on every progress step; a running job whose
+    # heartbeat is too old belongs to a dead worker
+    heartbeat_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
@@ -4,6 +4,17 @@ from models.base import Base
 
 class Schedule(Base):
     __tablename__ = "schedules"
+    __table_args__ = (
+        # Weekly/day reads: filter user (+ day), order by day, start_time, id;
+        # task_id/end_time included so the schedules side is index-only
+        db.Index(
+            "ix_schedules_user_id_day_start_time",
+            "user_id", "day", "start_time", "id",
+            postgresql_include=["task_id", "end_time"],
+        ),
+        # Deleting a task's rows
+        db.Index("ix_schedules_task_id", "task_id"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
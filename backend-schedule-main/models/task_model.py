@@ -5,6 +5,12 @@ from models.base import Base
 
 class Task(Base):
     __tablename__ = "tasks"
+    __table_args__ = (
+        # Fixed/flex lists (the user_id prefix also serves "all tasks of a user")
+        db.Index("ix_tasks_user_id_mode", "user_id", "mode"),
+        # Upcoming deadlines: user + deadline range, ordered by deadline
+        db.Index("ix_tasks_user_id_deadline_day", "user_id", "deadline_day", "deadline_time"),
+    )
 
     id = db.Column(db.Integer, primary_key=True)
     user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
@@ -10,6 +10,9 @@ class User(Base):
     password_hash = db.Column(db.String(255), nullable=False)
     name = db.Column(db.String(120))
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
+
+    # Naik setiap kali task/constraint/schedule user berubah (ETag GET)
+    data_version = db.Column(db.Integer, nullable=False, default=0, server_default="0")
     
     # relationships
     tasks = db.relationship("Task", backref="user", lazy=True)
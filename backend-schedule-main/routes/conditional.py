@@ -0,0 +1,61 @@
+"""
+Conditional GET for per-user read routes.
+
+    @task_bp.route('/<int:user_id>', methods=['GET'])
+    @conditional_get("user_id")
+    def get_user_tasks(user_id): ...
+
+The decorator looks up the owner's users.data_version (services/
+data_version.py) from the view argument named by key ("user_id", or
+"task_id" for task-scoped routes), and turns it into a weak ETag. If the
+request's If-None-Match already has that ETag it answers 304 without
+calling the view, so none of the service queries run. Otherwise the view
+runs and a 200 response gets the ETag.
+
+Responses that also depend on the current date (today's schedule,
+upcoming deadlines) pass vary=today so the ETag changes at midnight.
+"""
+import functools
+from datetime import date
+
+from flask import make_response, request
+
+from services import data_version
+
+_LOOKUPS = {
+    "user_id": data_version.for_user,
+    "task_id": data_version.for_task,
+}
+
+
+def today():
+    return date.today().isoformat()
+
+
+def conditional_get(key="user_id", vary=None):
+    lookup = _LOOKUPS[key]
+
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(**kwargs):
+            versioned = lookup(kwargs[key])
+            if versioned is None:
+                # Unknown user/task: nothing to version, let the view answer
+                return view(**kwargs)
+
+            user_id, version = versioned
+            etag = f"{user_id}-{version}" + (f"-{vary()}" if vary else "")
+
+            if request.if_none_match.contains_weak(etag):
+                response = make_response("", 304)
+            else:
+                response = make_response(view(**kwargs))
+                if response.status_code != 200:
+                    return response
+
+            response.set_etag(etag, weak=True)
+            return response
+
+        return wrapper
+
+    return decorator
@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from services.constraint_service import ConstraintService
+from routes.conditional import conditional_get
 
 constraint_bp = Blueprint('constraints', __name__, url_prefix='/api/constraints')
 
@@ -17,11 +18,14 @@ def create_global_constraint():
         
         result = ConstraintService.create_global_constraint(data)
         return jsonify(result), 201
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @constraint_bp.route('/global/<int:user_id>', methods=['GET'])
+@conditional_get("user_id")
 def get_global_constraints(user_id):
     """Get all global constraints for a user"""
     try:
@@ -40,6 +44,8 @@ def update_global_constraint(constraint_id):
         if not result:
             return jsonify({"error": "Constraint not found"}), 404
         return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -70,11 +76,14 @@ def create_task_constraint():
         
         result = ConstraintService.create_task_constraint(data)
         return jsonify(result), 201
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
 
 @constraint_bp.route('/task/<int:task_id>', methods=['GET'])
+@conditional_get("task_id")
 def get_task_constraints(task_id):
     """Get all constraints for a specific task"""
     try:
@@ -93,6 +102,8 @@ def update_task_constraint(constraint_id):
         if not result:
             return jsonify({"error": "Constraint not found"}), 404
         return jsonify(result), 200
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     except Exception as e:
         return jsonify({"error": str(e)}), 500
 
@@ -110,6 +121,7 @@ def delete_task_constraint(constraint_id):
 
 
 @constraint_bp.route('/user/<int:user_id>', methods=['GET'])
+@conditional_get("user_id")
 def get_all_user_constraints(user_id):
     """Get all constraints (global + task-based) for a user"""
     try:
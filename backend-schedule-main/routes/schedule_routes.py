@@ -1,16 +1,52 @@
 from flask import Blueprint, request, jsonify
 from services.schedule_service import ScheduleService
+from services.schedule_job_service import ScheduleJobService
+from services.solver_engine import available_engines
+from routes.conditional import conditional_get, today
 
 schedule_bp = Blueprint('schedule', __name__, url_prefix='/api/schedule')
 
+
+def _is_positive_int(value):
+    # bool is an int subclass: JSON true must not pass as 1
+    return isinstance(value, int) and not isinstance(value, bool) and value > 0
+
+
 @schedule_bp.route('/generate/<int:user_id>', methods=['POST'])
 def generate_schedule(user_id):
     """
     Generate weekly schedule for a user based on tasks and constraints.
     This will run the CSP solver and create/update schedules.
+
+    Optional "time_budget_ms" (JSON body or query string) switches the
+    solver to anytime mode: it keeps improving the schedule until the
+    budget runs out and returns the best one found.
+
+    Optional "engine" (JSON body or query string) picks the solver
+    strategy; see GET /api/schedule/engines.
+
+    Optional "profile" (true / ?profile=1) adds solver instrumentation
+    (counters, rejections per constraint type, phase timings, peak memory)
+    to the response.
     """
     try:
-        result = ScheduleService.generate_weekly_schedule(user_id)
+        data = request.get_json(silent=True) or {}
+        time_budget_ms = data.get('time_budget_ms', request.args.get('time_budget_ms', type=int))
+        engine = data.get('engine', request.args.get('engine'))
+        profile = data.get('profile', request.args.get('profile', '').lower() in ('1', 'true', 'yes'))
+
+        if time_budget_ms is not None and not _is_positive_int(time_budget_ms):
+            return jsonify({"error": "time_budget_ms must be a positive integer", "success": False}), 400
+
+        if engine is not None and engine not in available_engines():
+            return jsonify({
+                "error": f"engine must be one of: {', '.join(available_engines())}",
+                "success": False
+            }), 400
+
+        result = ScheduleService.generate_weekly_schedule(
+            user_id, time_budget_ms=time_budget_ms, engine=engine, profile=bool(profile)
+        )
         
         if not result.get('success', False):
             return jsonify(result), 400
@@ -20,7 +56,59 @@ def generate_schedule(user_id):
         return jsonify({"error": str(e), "success": False}), 500
 
 
+@schedule_bp.route('/jobs/user/<int:user_id>', methods=['POST'])
+def submit_schedule_job(user_id):
+    """
+    Start schedule generation in the background and return at once (202)
+    with the job; poll GET /api/schedule/jobs/<job_id> for progress and
+    the result. Accepts the same "engine" / "time_budget_ms" options as
+    /generate. If the user already has a job queued or running, that job
+    is returned instead of starting another one.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        time_budget_ms = data.get('time_budget_ms', request.args.get('time_budget_ms', type=int))
+        engine = data.get('engine', request.args.get('engine'))
+
+        if time_budget_ms is not None and not _is_positive_int(time_budget_ms):
+            return jsonify({"error": "time_budget_ms must be a positive integer", "success": False}), 400
+
+        if engine is not None and engine not in available_engines():
+            return jsonify({
+                "error": f"engine must be one of: {', '.join(available_engines())}",
+                "success": False
+            }), 400
+
+        job = ScheduleJobService.submit(user_id, engine=engine, time_budget_ms=time_budget_ms)
+        return jsonify(job), 202
+    except Exception as e:
+        return jsonify({"error": str(e), "success": False}), 500
+
+
+@schedule_bp.route('/jobs/<int:job_id>', methods=['GET'])
+def get_schedule_job(job_id):
+    """Status, progress and (once finished) result of a generation job"""
+    try:
+        job = ScheduleJobService.get_job(job_id)
+        if not job:
+            return jsonify({"error": "Job not found"}), 404
+        return jsonify(job), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@schedule_bp.route('/jobs/user/<int:user_id>', methods=['GET'])
+def get_user_schedule_jobs(user_id):
+    """Most recent generation jobs of a user"""
+    try:
+        jobs = ScheduleJobService.get_user_jobs(user_id)
+        return jsonify({"jobs": jobs}), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
 @schedule_bp.route('/<int:user_id>', methods=['GET'])
+@conditional_get("user_id")
 def get_user_schedule(user_id):
     """Get the current week's schedule for a user"""
     try:
@@ -31,6 +119,7 @@ def get_user_schedule(user_id):
 
 
 @schedule_bp.route('/today/<int:user_id>', methods=['GET'])
+@conditional_get("user_id", vary=today)
 def get_today_schedule(user_id):
     """Get today's schedule for a user"""
     try:
@@ -41,6 +130,7 @@ def get_today_schedule(user_id):
 
 
 @schedule_bp.route('/day/<int:user_id>/<string:day>', methods=['GET'])
+@conditional_get("user_id")
 def get_day_schedule(user_id, day):
     """Get schedule for a specific day"""
     try:
@@ -73,6 +163,7 @@ def delete_schedule_item(schedule_id):
 
 
 @schedule_bp.route('/conflicts/<int:user_id>', methods=['GET'])
+@conditional_get("user_id")
 def check_conflicts(user_id):
     """Check for scheduling conflicts before generating"""
     try:
@@ -83,6 +174,7 @@ def check_conflicts(user_id):
 
 
 @schedule_bp.route('/deadlines/<int:user_id>', methods=['GET'])
+@conditional_get("user_id", vary=today)
 def get_upcoming_deadlines(user_id):
     """Get upcoming deadlines from scheduled tasks"""
     try:
@@ -90,4 +182,28 @@ def get_upcoming_deadlines(user_id):
         deadlines = ScheduleService.get_upcoming_deadlines(user_id, days)
         return jsonify({"deadlines": deadlines}), 200
     except Exception as e:
-        return jsonify({"error": str(e)}), 500
\ No newline at end of file
+        return jsonify({"error": str(e)}), 500
+
+
+@schedule_bp.route('/engines', methods=['GET'])
+def get_engines():
+    """List the selectable solver engines"""
+    return jsonify({"engines": available_engines()}), 200
+
+
+@schedule_bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Solver result cache hit/miss counters"""
+    try:
+        return jsonify(ScheduleService.cache_stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
+
+
+@schedule_bp.route('/cache/read/stats', methods=['GET'])
+def get_read_cache_stats():
+    """Hit/miss counters of the per-user read cache (schedule, task and constraint getters)"""
+    try:
+        return jsonify(ScheduleService.read_cache_stats()), 200
+    except Exception as e:
+        return jsonify({"error": str(e)}), 500
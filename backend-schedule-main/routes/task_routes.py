@@ -1,5 +1,6 @@
 from flask import Blueprint, request, jsonify
 from services.task_service import TaskService
+from routes.conditional import conditional_get, today
 from datetime import datetime
 
 task_bp = Blueprint('tasks', __name__, url_prefix='/api/tasks')
@@ -21,6 +22,7 @@ def create_task():
 
 
 @task_bp.route('/<int:user_id>', methods=['GET'])
+@conditional_get("user_id")
 def get_user_tasks(user_id):
     """Get all tasks for a user"""
     try:
@@ -31,6 +33,7 @@ def get_user_tasks(user_id):
 
 
 @task_bp.route('/<int:task_id>', methods=['GET'])
+@conditional_get("task_id")
 def get_task(task_id):
     """Get a specific task by ID"""
     try:
@@ -68,6 +71,7 @@ def delete_task(task_id):
 
 
 @task_bp.route('/fixed/<int:user_id>', methods=['GET'])
+@conditional_get("user_id")
 def get_fixed_tasks(user_id):
     """Get all fixed tasks for a user"""
     try:
@@ -78,6 +82,7 @@ def get_fixed_tasks(user_id):
 
 
 @task_bp.route('/flex/<int:user_id>', methods=['GET'])
+@conditional_get("user_id")
 def get_flex_tasks(user_id):
     """Get all flexible tasks for a user"""
     try:
@@ -88,6 +93,7 @@ def get_flex_tasks(user_id):
 
 
 @task_bp.route('/upcoming/<int:user_id>', methods=['GET'])
+@conditional_get("user_id", vary=today)
 def get_upcoming_deadlines(user_id):
     """Get tasks with upcoming deadlines"""
     try:
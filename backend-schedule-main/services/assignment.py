@@ -0,0 +1,88 @@
+"""
+Maximum-weight bipartite assignment in NumPy.
+
+max_weight_assignment() is the Hungarian algorithm in its shortest
+augmenting path form (Jonker-Volgenant style potentials): one augmentation
+per row, each a Dijkstra-like scan whose inner loop over columns is a
+vectorized NumPy step. O(n^2 * m) for an n x m matrix with n <= m; the
+matrix is transposed internally when it has more rows than columns, so
+either orientation costs O(min^2 * max).
+
+Used by CSPScheduler's "optimal" mode; no external solver required.
+"""
+import time
+
+import numpy as np
+
+
+def max_weight_assignment(weights, deadline=None):
+    """
+    Pairs (row, col) maximizing the total weight, each row and column used
+    at most once. Only pairs with positive weight are returned, so a weight
+    <= 0 means "not allowed" (leaving both sides unassigned is as good).
+    Raises TimeoutError once time.time() passes deadline (checked per row).
+    """
+    weights = np.asarray(weights, dtype=float)
+    if weights.size == 0:
+        return []
+
+    transposed = weights.shape[0] > weights.shape[1]
+    # Minimize cost; disallowed pairs cost the same as staying unassigned
+    cost = -np.maximum(weights.T if transposed else weights, 0.0)
+    row_of_col = _min_cost_rows(cost, deadline)
+
+    pairs = []
+    for col, row in enumerate(row_of_col):
+        if row < 0 or cost[row, col] >= 0:
+            continue
+        pairs.append((col, row) if transposed else (row, col))
+    return sorted(pairs)
+
+
+def _min_cost_rows(cost, deadline=None):
+    """For an n x m cost matrix (n <= m): assigned row per column, -1 if none"""
+    n, m = cost.shape
+    # Index 0 is a virtual column used as the search root (1-based below)
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    row_of = np.zeros(m + 1, dtype=np.int64)
+    way = np.zeros(m + 1, dtype=np.int64)
+
+    for row in range(1, n + 1):
+        if deadline is not None and time.time() >= deadline:
+            raise TimeoutError("assignment deadline passed")
+        row_of[0] = row
+        col = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+
+        # Grow a shortest-path tree until it reaches a free column
+        while True:
+            used[col] = True
+            current_row = row_of[col]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+
+            open_cols = ~used[1:]
+            improved = open_cols & (reduced < min_reduced[1:])
+            min_reduced[1:][improved] = reduced[improved]
+            way[1:][improved] = col
+
+            candidates = np.where(open_cols, min_reduced[1:], np.inf)
+            next_col = int(candidates.argmin()) + 1
+            delta = candidates[next_col - 1]
+
+            u[row_of[used]] += delta
+            v[used] -= delta
+            min_reduced[1:][open_cols] -= delta
+
+            col = next_col
+            if row_of[col] == 0:
+                break
+
+        # Flip the augmenting path back to the root
+        while col:
+            previous = way[col]
+            row_of[col] = row_of[previous]
+            col = previous
+
+    return row_of[1:] - 1
@@ -0,0 +1,266 @@
+"""
+Overnight regeneration of every user's weekly schedule.
+
+User ids are streamed from the database in keyset-paginated chunks. Each
+chunk's tasks and constraints are loaded with three bulk queries, solved
+in a process pool (one CSPScheduler run per user), and written back per
+chunk as a bulk diff against the stored rows (see schedule_writer), so
+unchanged rows cost nothing. The next chunk is loaded and submitted
+while the previous one is still solving, so workers stay busy.
+"""
+import logging
+import time
+from concurrent.futures import CancelledError, ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+
+from core.database import SessionLocal
+from models.constraint_global_model import GlobalConstraint
+from models.constraint_task_model import TaskConstraint
+from models.task_model import Task
+from models.user_model import User
+from services import data_version
+from services.schedule_service import ScheduleService
+from services.schedule_writer import write_schedules
+
+logger = logging.getLogger(__name__)
+
+
+def _solve_user(payload):
+    """Worker entry point: solve one user, never raise"""
+    user_id, tasks, global_constraints, invalid = payload
+    try:
+        result = ScheduleService._solve(tasks, global_constraints, invalid)
+        return user_id, result, None
+    except Exception as e:
+        return user_id, None, f"{type(e).__name__}: {e}"
+
+
+class _SolverPool:
+    """
+    ProcessPoolExecutor that is replaced instead of taking the batch down.
+
+    A worker that dies (segfault, OOM kill) breaks the whole executor:
+    every pending future, including the next chunk's, fails with
+    BrokenProcessPool and further submits raise. restart() throws the
+    broken executor away (killing its workers, so a hung solve goes too)
+    and the next submit() starts a fresh one.
+    """
+
+    def __init__(self, workers):
+        self.workers = workers
+        self._pool = None
+
+    def submit(self, payload):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        try:
+            return self._pool.submit(_solve_user, payload)
+        except BrokenProcessPool:
+            self.restart()
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+            return self._pool.submit(_solve_user, payload)
+
+    def restart(self):
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+        # No public way to stop a running task: kill the workers outright
+        for process in list((pool._processes or {}).values()):
+            process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+class BatchScheduleService:
+
+    @staticmethod
+    def regenerate_all(user_ids=None, workers=None, chunk_size=200, progress=None, solve_timeout_s=120):
+        """
+        Regenerate schedules for user_ids (default: every user).
+
+        progress(stats) is called after every written chunk. A user whose
+        solve or write fails is recorded in stats["errors"] and skipped;
+        the rest of the batch carries on. That includes a solve that
+        crashes its worker process (the pool is rebuilt and the other
+        users it took down are solved again) and one that runs longer
+        than solve_timeout_s.
+        """
+        session = SessionLocal()
+        stats = {
+            "total": 0,
+            "done": 0,
+            "succeeded": 0,
+            "failed": 0,
+            "rows_written": 0,
+            "errors": {},
+            "elapsed_s": 0.0,
+        }
+        started = time.perf_counter()
+
+        try:
+            if user_ids is None:
+                stats["total"] = session.query(User.id).count()
+                chunks = BatchScheduleService._stream_user_ids(session, chunk_size)
+            else:
+                user_ids = list(user_ids)
+                stats["total"] = len(user_ids)
+                chunks = (user_ids[i:i + chunk_size] for i in range(0, len(user_ids), chunk_size))
+
+            pool = _SolverPool(workers)
+            try:
+                in_flight = None
+                for chunk in chunks:
+                    payloads = BatchScheduleService._load_chunk(session, chunk)
+                    futures = [(payload, pool.submit(payload)) for payload in payloads]
+
+                    if in_flight is not None:
+                        BatchScheduleService._finish_chunk(
+                            session, pool, in_flight, stats, started, progress, solve_timeout_s
+                        )
+                    in_flight = futures
+
+                if in_flight is not None:
+                    BatchScheduleService._finish_chunk(
+                        session, pool, in_flight, stats, started, progress, solve_timeout_s
+                    )
+            finally:
+                pool.close()
+
+            return stats
+
+        finally:
+            session.close()
+
+    @staticmethod
+    def _stream_user_ids(session, chunk_size):
+        """Yield lists of user ids, keyset-paginated so no cursor stays open"""
+        last_id = 0
+        while True:
+            ids = [
+                row.id for row in session.query(User.id)
+                    .filter(User.id > last_id)
+                    .order_by(User.id)
+                    .limit(chunk_size)
+            ]
+            if not ids:
+                return
+            yield ids
+            last_id = ids[-1]
+
+    @staticmethod
+    def _load_chunk(session, user_ids):
+        """Solver payloads for a chunk of users, in three queries"""
+        tasks = session.query(Task).filter(Task.user_id.in_(user_ids)).all()
+
+        constraints_by_task = {}
+        task_constraints = session.query(TaskConstraint)\
+            .join(Task, Task.id == TaskConstraint.task_id)\
+            .filter(Task.user_id.in_(user_ids)).all()
+        for c in task_constraints:
+            constraints_by_task.setdefault(c.task_id, []).append(
+                {"type": c.type, "value": c.value, "priority": c.priority}
+            )
+
+        globals_by_user = {user_id: [] for user_id in user_ids}
+        for c in session.query(GlobalConstraint).filter(GlobalConstraint.user_id.in_(user_ids)).all():
+            globals_by_user[c.user_id].append({"type": c.type, "value": c.value, "priority": c.priority})
+
+        tasks_by_user = {user_id: [] for user_id in user_ids}
+        for t in tasks:
+            tasks_by_user[t.user_id].append(t)
+
+        payloads = []
+        for user_id in user_ids:
+            solver_tasks, invalid = ScheduleService._build_solver_tasks(
+                tasks_by_user[user_id], constraints_by_task
+            )
+            payloads.append((user_id, solver_tasks, globals_by_user[user_id], invalid))
+
+        # Detach everything so the next chunk starts with an empty identity map
+        session.expunge_all()
+        return payloads
+
+    @staticmethod
+    def _finish_chunk(session, pool, futures, stats, started, progress, solve_timeout_s):
+        """Collect a chunk's solves and write the successful ones in bulk"""
+        outcomes = []
+        lost = []
+        for payload, future in futures:
+            try:
+                outcomes.append(future.result(timeout=solve_timeout_s))
+            except (BrokenProcessPool, CancelledError):
+                # Some worker died (not necessarily this user's): solve again below
+                lost.append(payload)
+            except FutureTimeout:
+                outcomes.append((payload[0], None, f"Solve timed out after {solve_timeout_s}s"))
+                # The hung worker only goes away with the pool; solves still
+                # in flight on it come back as lost
+                pool.restart()
+
+        # One at a time, so a crash can only be this user's
+        for payload in lost:
+            outcomes.append(BatchScheduleService._solve_alone(pool, payload, solve_timeout_s))
+
+        solved = {}
+        for user_id, result, error in outcomes:
+            if error is not None:
+                stats["errors"][user_id] = error
+                logger.warning("Schedule solve failed for user %s: %s", user_id, error)
+            else:
+                solved[user_id] = result
+
+        try:
+            stats["rows_written"] += BatchScheduleService._write_results(session, solved)
+        except Exception:
+            # Bulk write failed: retry one user at a time to isolate the bad one
+            session.rollback()
+            for user_id in list(solved):
+                try:
+                    stats["rows_written"] += BatchScheduleService._write_results(
+                        session, {user_id: solved[user_id]}
+                    )
+                except Exception as e:
+                    session.rollback()
+                    del solved[user_id]
+                    stats["errors"][user_id] = f"{type(e).__name__}: {e}"
+                    logger.warning("Schedule write failed for user %s: %s", user_id, e)
+
+        stats["done"] += len(futures)
+        stats["succeeded"] += len(solved)
+        stats["failed"] = len(stats["errors"])
+        stats["elapsed_s"] = round(time.perf_counter() - started, 3)
+
+        if progress is not None:
+            progress(stats)
+
+    @staticmethod
+    def _solve_alone(pool, payload, solve_timeout_s):
+        user_id = payload[0]
+        future = pool.submit(payload)
+        try:
+            return future.result(timeout=solve_timeout_s)
+        except (BrokenProcessPool, CancelledError):
+            pool.restart()
+            return user_id, None, "Worker process crashed while solving this user"
+        except FutureTimeout:
+            pool.restart()
+            return user_id, None, f"Solve timed out after {solve_timeout_s}s"
+
+    @staticmethod
+    def _write_results(session, solved):
+        """Store the schedules of the given users in one transaction, rows that changed only"""
+        if not solved:
+            return 0
+
+        writes = write_schedules(
+            session, {user_id: result["schedule"] for user_id, result in solved.items()}
+        )
+        # Users whose week came out unchanged keep their cached reads
+        data_version.touch(session, *writes["per_user"])
+        session.commit()
+        return writes["inserted"] + writes["updated"] + writes["deleted"]
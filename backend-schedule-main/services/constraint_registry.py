@@ -0,0 +1,363 @@
+"""
+Constraint-type registry.
+
+Each constraint type has one handler that knows how to
+- validate(value): check a JSON value on write and return it normalized
+  (ConstraintService calls this; bad values raise ValueError)
+- compile(value): turn a stored value into a small object the solver uses
+  directly -- a start-time range, a day filter, an exact time, a global
+  day window or a daily limit -- so the value is parsed once per solve
+  instead of once per candidate
+- hard: whether the solver must satisfy it or may only score it (soft
+  daily limits become hard at priority >= HARD_PRIORITY)
+
+Adding a type means registering a handler here; the solver core only
+knows the compiled kinds below.
+"""
+from abc import ABC, abstractmethod
+from datetime import date
+
+from services.solver_time import MINUTES_PER_DAY, to_minutes
+
+# Hour boundaries, in minutes
+NOON = 12 * 60
+EVENING = 18 * 60
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+
+GLOBAL = "global"
+TASK = "task"
+
+# Soft constraints at or above this priority are enforced as hard
+HARD_PRIORITY = 5
+
+_HANDLERS = {}
+
+
+def register(cls):
+    """Class decorator: register a handler for its type (and aliases) in its scopes"""
+    handler = cls()
+    for ctype in (cls.type,) + cls.aliases:
+        for scope in cls.scopes:
+            _HANDLERS[(scope, ctype)] = handler
+    return cls
+
+
+def get_handler(scope, ctype):
+    return _HANDLERS.get((scope, ctype))
+
+
+def known_types(scope):
+    return sorted(ctype for handler_scope, ctype in _HANDLERS if handler_scope == scope)
+
+
+def validate(scope, ctype, value):
+    """Validated, normalized value for a constraint; ValueError if it isn't valid"""
+    handler = get_handler(scope, ctype)
+    if handler is None:
+        raise ValueError(
+            f"Unknown {scope} constraint type '{ctype}'. Known types: {', '.join(known_types(scope))}"
+        )
+    return handler.validate(value)
+
+
+def compile_constraint(scope, constraint):
+    """Compiled form of a constraint dict, None for unknown types, ValueError for bad values"""
+    handler = get_handler(scope, constraint["type"])
+    if handler is None:
+        return None
+    compiled = handler.compile(constraint.get("value"))
+    compiled.type = constraint["type"]
+    compiled.priority = constraint.get("priority")
+    compiled.hard = handler.hard or (compiled.priority or 0) >= HARD_PRIORITY
+    return compiled
+
+
+# ==========================================================
+# COMPILED KINDS (what the solver consumes)
+# ==========================================================
+class StartRange:
+    """Task may only start in [lo, hi) minutes"""
+
+    def __init__(self, lo, hi):
+        self.lo = lo
+        self.hi = hi
+
+    def masks(self, scheduler, task):
+        return [scheduler._range_mask(self.lo, self.hi)] * len(scheduler.days)
+
+    def allows(self, scheduler, day_index, start_time, end_time):
+        return self.lo <= start_time < self.hi
+
+
+class DayFilter:
+    """Task must be on a given weekday / ISO date"""
+
+    def __init__(self, day):
+        self.day = day
+
+    def masks(self, scheduler, task):
+        return [
+            scheduler.full_mask if scheduler._day_matches(index, self.day) else 0
+            for index in range(len(scheduler.days))
+        ]
+
+    def allows(self, scheduler, day_index, start_time, end_time):
+        return scheduler._day_matches(day_index, self.day)
+
+
+class ExactTime:
+    """Task must occupy exactly [start, end)"""
+
+    def __init__(self, start, end):
+        self.start = start
+        self.end = end
+
+    def masks(self, scheduler, task):
+        if self.end - self.start != task["duration"]:
+            allowed = 0
+        else:
+            allowed = scheduler._range_mask(self.start, self.start + 1)
+        return [allowed] * len(scheduler.days)
+
+    def allows(self, scheduler, day_index, start_time, end_time):
+        return start_time == self.start and end_time == self.end
+
+
+class DayWindow:
+    """Global: earliest start / latest end every day, and days that are off"""
+
+    def __init__(self, min_start=None, max_end=None, disallowed_days=()):
+        self.min_start = min_start
+        self.max_end = max_end
+        self.disallowed_days = frozenset(disallowed_days)
+
+
+class DailyLimit:
+    """Global: cap on booked minutes and/or number of tasks per day"""
+
+    def __init__(self, max_minutes=None, max_tasks=None):
+        self.max_minutes = max_minutes
+        self.max_tasks = max_tasks
+
+
+# ==========================================================
+# HANDLERS
+# ==========================================================
+class ConstraintHandler(ABC):
+    type = None
+    aliases = ()
+    scopes = (TASK,)
+    hard = True
+
+    def validate(self, value):
+        return value
+
+    @abstractmethod
+    def compile(self, value):
+        """Compiled form of a (validated) value, one of the kinds above"""
+
+
+class _TimeOfDayHandler(ConstraintHandler):
+    """must_morning / must_afternoon / must_evening: no value needed"""
+    lo = 0
+    hi = MINUTES_PER_DAY
+
+    def validate(self, value):
+        if value not in (None, {}, [], ""):
+            raise ValueError(f"{self.type} takes no value")
+        return {}
+
+    def compile(self, value):
+        return StartRange(self.lo, self.hi)
+
+
+@register
+class MustMorning(_TimeOfDayHandler):
+    type = "must_morning"
+    lo, hi = 0, NOON
+
+
+@register
+class MustAfternoon(_TimeOfDayHandler):
+    type = "must_afternoon"
+    lo, hi = NOON, EVENING
+
+
+@register
+class MustEvening(_TimeOfDayHandler):
+    type = "must_evening"
+    lo, hi = EVENING, MINUTES_PER_DAY
+
+
+@register
+class FixedDay(ConstraintHandler):
+    type = "fixed_day"
+    aliases = ("day",)
+
+    def validate(self, value):
+        return {"day": parse_day(value["day"] if isinstance(value, dict) else value)}
+
+    def compile(self, value):
+        return DayFilter(self.validate(value)["day"])
+
+
+@register
+class FixedTime(ConstraintHandler):
+    type = "fixed_time"
+
+    def validate(self, value):
+        if not isinstance(value, dict):
+            raise ValueError("fixed_time value must be {\"start\": \"HH:MM\", \"end\": \"HH:MM\"}")
+        start = parse_time(value.get("start"), "fixed_time start")
+        end = parse_time(value.get("end"), "fixed_time end")
+        if end <= start:
+            raise ValueError("fixed_time end must be after start")
+        return {"start": value["start"], "end": value["end"]}
+
+    def compile(self, value):
+        self.validate(value)
+        return ExactTime(parse_time(value["start"]), parse_time(value["end"]))
+
+
+class _BoundaryTimeHandler(ConstraintHandler):
+    """min_start_time / max_end_time: {"time": "HH:MM"}"""
+    scopes = (GLOBAL,)
+    default = None
+
+    def validate(self, value):
+        if not isinstance(value, dict) or "time" not in value:
+            raise ValueError(f"{self.type} value must be {{\"time\": \"HH:MM\"}}")
+        parse_time(value["time"], self.type)
+        return {"time": value["time"]}
+
+    def compile(self, value):
+        # Historical solver default when "time" is missing
+        if not isinstance(value, dict):
+            raise ValueError(f"{self.type} value must be an object")
+        return self._window(parse_time(value.get("time", self.default), self.type))
+
+
+@register
+class MinStartTime(_BoundaryTimeHandler):
+    type = "min_start_time"
+    default = 6 * 60
+
+    def _window(self, minute):
+        return DayWindow(min_start=minute)
+
+
+@register
+class MaxEndTime(_BoundaryTimeHandler):
+    type = "max_end_time"
+    default = 23 * 60
+
+    def _window(self, minute):
+        return DayWindow(max_end=minute)
+
+
+@register
+class AllowedTimeRange(ConstraintHandler):
+    """Legacy csp_solver vocabulary: ["HH:MM", "HH:MM"]"""
+    type = "allowed_time_range"
+    scopes = (GLOBAL,)
+
+    def validate(self, value):
+        if isinstance(value, dict):
+            value = [value.get("start"), value.get("end")]
+        if not isinstance(value, (list, tuple)) or len(value) != 2:
+            raise ValueError("allowed_time_range value must be [\"HH:MM\", \"HH:MM\"]")
+        if parse_time(value[1], "allowed_time_range end") <= parse_time(value[0], "allowed_time_range start"):
+            raise ValueError("allowed_time_range end must be after start")
+        return list(value)
+
+    def compile(self, value):
+        start, end = self.validate(value)
+        return DayWindow(min_start=parse_time(start), max_end=parse_time(end))
+
+
+@register
+class DisallowedDays(ConstraintHandler):
+    type = "disallowed_days"
+    scopes = (GLOBAL,)
+
+    def validate(self, value):
+        if isinstance(value, str):
+            value = [value]
+        if not isinstance(value, (list, tuple)):
+            raise ValueError("disallowed_days value must be a list of days")
+        return [parse_day(day) for day in value]
+
+    def compile(self, value):
+        return DayWindow(disallowed_days=self.validate(value))
+
+
+@register
+class MaxDailyDuration(ConstraintHandler):
+    """{"minutes": n} or {"hours": n}"""
+    type = "max_daily_duration"
+    scopes = (GLOBAL,)
+    hard = False
+
+    def validate(self, value):
+        if not isinstance(value, dict) or not ({"minutes", "hours"} & set(value)):
+            raise ValueError("max_daily_duration value must be {\"minutes\": n} or {\"hours\": n}")
+        minutes = value["minutes"] if "minutes" in value else value["hours"] * 60
+        if not isinstance(minutes, (int, float)) or isinstance(minutes, bool) or minutes <= 0:
+            raise ValueError("max_daily_duration must be a positive number")
+        return dict(value)
+
+    def compile(self, value):
+        value = self.validate(value)
+        minutes = value["minutes"] if "minutes" in value else value["hours"] * 60
+        return DailyLimit(max_minutes=int(minutes))
+
+
+@register
+class MaxTasksPerDay(ConstraintHandler):
+    """{"count": n}"""
+    type = "max_tasks_per_day"
+    scopes = (GLOBAL,)
+    hard = False
+
+    def validate(self, value):
+        count = value.get("count") if isinstance(value, dict) else value
+        if not isinstance(count, int) or isinstance(count, bool) or count <= 0:
+            raise ValueError("max_tasks_per_day value must be {\"count\": n} with n > 0")
+        return {"count": count}
+
+    def compile(self, value):
+        return DailyLimit(max_tasks=self.validate(value)["count"])
+
+
+# ==========================================================
+# VALUE PARSING
+# ==========================================================
+def parse_time(value, label="time"):
+    """Minutes since midnight for "HH:MM" (or int minutes); ValueError otherwise"""
+    if isinstance(value, int) and not isinstance(value, bool):
+        minute = value
+    elif isinstance(value, str):
+        parts = value.split(":")
+        if len(parts) not in (2, 3) or not all(p.isdigit() for p in parts) or int(parts[1]) >= 60:
+            raise ValueError(f"{label} must be \"HH:MM\", got {value!r}")
+        minute = to_minutes(value)
+    else:
+        raise ValueError(f"{label} must be \"HH:MM\", got {value!r}")
+
+    if not 0 <= minute <= MINUTES_PER_DAY:
+        raise ValueError(f"{label} must be between 00:00 and 24:00, got {value!r}")
+    return minute
+
+
+def parse_day(value):
+    """Lowercase weekday name or ISO date string; ValueError otherwise"""
+    if not isinstance(value, str):
+        raise ValueError(f"day must be a weekday name or YYYY-MM-DD, got {value!r}")
+    day = value.strip().lower()
+    if day in WEEKDAYS:
+        return day
+    try:
+        return date.fromisoformat(day).isoformat()
+    except ValueError:
+        raise ValueError(f"day must be a weekday name or YYYY-MM-DD, got {value!r}")
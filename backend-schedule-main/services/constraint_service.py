@@ -2,6 +2,10 @@ from core.database import SessionLocal
 from models.constraint_global_model import GlobalConstraint
 from models.constraint_task_model import TaskConstraint
 from models.task_model import Task
+from services import constraint_registry
+from services import data_version
+from services.read_cache import cached_read
+from services.schedule_service import ScheduleService
 
 class ConstraintService:
 
@@ -9,23 +13,28 @@ class ConstraintService:
     def create_global_constraint(data):
         session = SessionLocal()
         try:
+            value = constraint_registry.validate(constraint_registry.GLOBAL, data["type"], data.get("value"))
             new_c = GlobalConstraint(
                 user_id=data["user_id"],
                 type=data["type"],
-                value=data["value"],
+                value=value,
                 priority=data.get("priority", 3)
             )
 
             session.add(new_c)
+            data_version.touch(session, new_c.user_id)
             session.commit()
             session.refresh(new_c)
 
-            return ConstraintService._global_to_dict(new_c)
+            result = ConstraintService._global_to_dict(new_c)
+            ScheduleService.repair_after_change(new_c.user_id)
+            return result
 
         finally:
             session.close()
 
     @staticmethod
+    @cached_read
     def get_user_global_constraints(user_id):
         session = SessionLocal()
         try:
@@ -44,15 +53,20 @@ class ConstraintService:
             if not c:
                 return None
 
-            if "type" in data:
-                c.type = data["type"]
-            if "value" in data:
-                c.value = data["value"]
+            if "type" in data or "value" in data:
+                ctype = data.get("type", c.type)
+                c.value = constraint_registry.validate(
+                    constraint_registry.GLOBAL, ctype, data.get("value", c.value)
+                )
+                c.type = ctype
             if "priority" in data:
                 c.priority = data["priority"]
 
+            data_version.touch(session, c.user_id)
             session.commit()
-            return ConstraintService._global_to_dict(c)
+            result = ConstraintService._global_to_dict(c)
+            ScheduleService.repair_after_change(c.user_id)
+            return result
         finally:
             session.close()
 
@@ -64,8 +78,12 @@ class ConstraintService:
             if not c:
                 return False
 
+            user_id = c.user_id
             session.delete(c)
+            data_version.touch(session, user_id)
             session.commit()
+
+            ScheduleService.repair_after_change(user_id)
             return True
         finally:
             session.close()
@@ -76,17 +94,22 @@ class ConstraintService:
     def create_task_constraint(data):
         session = SessionLocal()
         try:
+            value = constraint_registry.validate(constraint_registry.TASK, data["type"], data.get("value", {}))
             new_c = TaskConstraint(
                 task_id=data["task_id"],
                 type=data["type"],
-                value=data.get("value", {}),
+                value=value,
                 priority=data.get("priority", 5)
             )
 
             session.add(new_c)
+            data_version.touch(session, ConstraintService._task_owner(session, new_c.task_id))
             session.commit()
             session.refresh(new_c)
-            return ConstraintService._task_to_dict(new_c)
+
+            result = ConstraintService._task_to_dict(new_c)
+            ConstraintService._repair_for_task(session, new_c.task_id)
+            return result
 
         finally:
             session.close()
@@ -111,15 +134,20 @@ class ConstraintService:
             if not c:
                 return None
 
-            if "type" in data:
-                c.type = data["type"]
-            if "value" in data:
-                c.value = data["value"]
+            if "type" in data or "value" in data:
+                ctype = data.get("type", c.type)
+                c.value = constraint_registry.validate(
+                    constraint_registry.TASK, ctype, data.get("value", c.value)
+                )
+                c.type = ctype
             if "priority" in data:
                 c.priority = data["priority"]
 
+            data_version.touch(session, ConstraintService._task_owner(session, c.task_id))
             session.commit()
-            return ConstraintService._task_to_dict(c)
+            result = ConstraintService._task_to_dict(c)
+            ConstraintService._repair_for_task(session, c.task_id)
+            return result
         finally:
             session.close()
 
@@ -131,13 +159,28 @@ class ConstraintService:
             if not c:
                 return False
 
+            task_id = c.task_id
             session.delete(c)
+            data_version.touch(session, ConstraintService._task_owner(session, task_id))
             session.commit()
+
+            ConstraintService._repair_for_task(session, task_id)
             return True
 
         finally:
             session.close()
 
+    @staticmethod
+    def _repair_for_task(session, task_id):
+        """Repair the owner's schedule after one task's constraints changed"""
+        task = session.query(Task).get(task_id)
+        if task:
+            ScheduleService.repair_after_change(task.user_id, [task_id])
+
+    @staticmethod
+    def _task_owner(session, task_id):
+        return session.query(Task.user_id).filter(Task.id == task_id).scalar()
+
     @staticmethod
     def _global_to_dict(c):
         return {
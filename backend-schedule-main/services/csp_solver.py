@@ -1,6 +1,10 @@
 import datetime
 from datetime import datetime as dt, timedelta
 
+from services import constraint_registry
+from services.day_occupancy import DayOccupancy
+from services.solver_time import to_minutes, to_time
+
 # Helper: parse time "HH:MM" → datetime.time
 def parse_time(t):
     return dt.strptime(t, "%H:%M").time()
@@ -31,13 +35,38 @@ def check_global_constraints(task_start, task_end, day, global_constraints):
             if day in value:
                 return False
 
-        # 3. max daily duration — handled later
-
-        # 4. max tasks per day — handled later
+        # 3. max daily duration / 4. max tasks per day: see daily_limits()
 
     return True
 
 
+# ===============================
+# DAILY LIMITS
+# ===============================
+def daily_limits(global_constraints):
+    """Compiled max_daily_duration / max_tasks_per_day rules, split (hard, soft)"""
+    hard, soft = [], []
+    for cons in global_constraints:
+        if cons["type"] not in ("max_daily_duration", "max_tasks_per_day"):
+            continue
+        try:
+            rule = constraint_registry.compile_constraint(constraint_registry.GLOBAL, cons)
+        except (ValueError, TypeError, KeyError):
+            continue
+        (hard if rule.hard else soft).append(rule)
+    return hard, soft
+
+
+def exceeds_limits(rules, minutes_booked, tasks_booked, duration):
+    """Would one more task of this duration break any rule? Uses running totals only"""
+    for rule in rules:
+        if rule.max_minutes is not None and minutes_booked + duration > rule.max_minutes:
+            return True
+        if rule.max_tasks is not None and tasks_booked >= rule.max_tasks:
+            return True
+    return False
+
+
 # ===============================
 # CHECK TASK CONSTRAINTS
 # ===============================
@@ -79,7 +108,7 @@ def check_task_constraints(task, day, start_time, end_time):
 # ===============================
 # MAIN CSP SOLVER
 # ===============================
-def generate_schedule(tasks, global_constraints):
+def generate_schedule(tasks, global_constraints, slot_minutes=30):
 
     # Sort task by priority (high → medium → low)
     priority_order = {"high": 1, "medium": 2, "low": 3}
@@ -91,7 +120,12 @@ def generate_schedule(tasks, global_constraints):
     final_schedule = []
 
     # Tracking waktu per hari
-    daily_slots = {day: [] for day in days}
+    daily_slots = {day: DayOccupancy() for day in days}
+
+    # Total berjalan per hari (menit terpakai, jumlah task)
+    minutes_booked = {day: 0 for day in days}
+    tasks_booked = {day: 0 for day in days}
+    hard_limits, soft_limits = daily_limits(global_constraints)
 
     # ===============================
     # TRY PLACE EACH TASK
@@ -101,57 +135,62 @@ def generate_schedule(tasks, global_constraints):
         duration = task["duration"]
         placed = False
 
-        for day in days:
+        # Soft limits: days that would go over are only tried last
+        day_order = days
+        if soft_limits:
+            day_order = sorted(
+                days, key=lambda d: exceeds_limits(soft_limits, minutes_booked[d], tasks_booked[d], duration)
+            )
+
+        for day in day_order:
 
             # Skip disallowed days
             if any(c["type"] == "disallowed_days" and day in c["value"] for c in global_constraints):
                 continue
 
-            # Try every possible start time
-            for hour in range(6, 23):  # 06:00 - 22:00
-                for minute in [0, 30]:
-
-                    start = dt.strptime(f"{hour:02d}:{minute:02d}", "%H:%M").time()
-                    end = add_minutes(start, duration)
-
-                    # Check overflow daily limit
-                    if end < start:
-                        continue
-
-                    # Check global constraints
-                    if not check_global_constraints(start, end, day, global_constraints):
-                        continue
-
-                    # Check task constraints
-                    if not check_task_constraints(task, day, start, end):
-                        continue
-
-                    # Check overlap
-                    overlap = False
-                    for existing in daily_slots[day]:
-                        if not (end <= existing["start"] or start >= existing["end"]):
-                            overlap = True
-                            break
-
-                    if overlap:
-                        continue
-
-                    # Place task
-                    scheduled = {
-                        "task_id": task["id"],
-                        "name": task["name"],
-                        "day": day,
-                        "start": start.strftime("%H:%M"),
-                        "end": end.strftime("%H:%M")
-                    }
-
-                    final_schedule.append(scheduled)
-                    daily_slots[day].append({"start": start, "end": end})
-                    placed = True
-                    break
-
-                if placed:
-                    break
+            # Skip days already at a hard daily limit
+            if exceeds_limits(hard_limits, minutes_booked[day], tasks_booked[day], duration):
+                continue
+
+            # Try every possible start time, 06:00 - 22:59 in slot_minutes steps
+            for start_minute in range(6 * 60, 23 * 60, slot_minutes):
+
+                start = to_time(start_minute)
+                end = add_minutes(start, duration)
+
+                # Check overflow daily limit
+                if end < start:
+                    continue
+
+                # Check global constraints
+                if not check_global_constraints(start, end, day, global_constraints):
+                    continue
+
+                # Check task constraints
+                if not check_task_constraints(task, day, start, end):
+                    continue
+
+                # Check overlap
+                end_minute = to_minutes(end)
+                if not daily_slots[day].fits(start_minute, end_minute):
+                    continue
+
+                # Place task
+                scheduled = {
+                    "task_id": task["id"],
+                    "name": task["name"],
+                    "day": day,
+                    "start": start.strftime("%H:%M"),
+                    "end": end.strftime("%H:%M")
+                }
+
+                final_schedule.append(scheduled)
+                daily_slots[day].add(start_minute, end_minute)
+                minutes_booked[day] += duration
+                tasks_booked[day] += 1
+                placed = True
+                break
+
             if placed:
                 break
 
@@ -1,202 +1,1467 @@
-from datetime import datetime, timedelta, date
-import copy
+from datetime import datetime, timedelta
+import math
+import random
+import time
+from functools import reduce
+from itertools import combinations
+from operator import and_
+
+import numpy as np
+
+from services.assignment import max_weight_assignment
+from services.constraint_registry import GLOBAL, TASK, DailyLimit, DayWindow, compile_constraint
+from services.day_occupancy import DayOccupancy
+from services.slot_scoring import build_score_table, masks_to_bool
+from services.solve_context import SolveContext
+from services.solver_profile import NULL_PROFILE, SolverProfile
+from services.solver_time import MINUTES_PER_DAY, to_minutes, to_label
+
+# Bump whenever a change can alter solver output (invalidates cached results)
+SOLVER_VERSION = "2.5"
+
+_WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Hour boundaries, in minutes
+_LATE = 22 * 60
+
+# Anytime / optimal objective: one more placed task always beats any score gain
+_PLACEMENT_WEIGHT = 1000
+_INITIAL_TEMPERATURE = 30.0
+
+# Score penalty per priority point for exceeding a soft daily limit
+_SOFT_LIMIT_WEIGHT = 20
+
+# Flex task placement orders (see _sort_flex_tasks)
+ORDERINGS = ("priority", "deadline", "longest", "random")
 
 class CSPScheduler:
     """
     Advanced CSP Scheduler with:
     - Hard constraints (must be satisfied)
     - Soft constraints (preferred but not required)
-    - Backtracking
+    - Backtracking (MRV ordering + forward checking, mode="backtrack")
+    - Anytime local search within a wall-clock budget (mode="anytime")
+    - Max-weight task/slot assignment (mode="optimal")
     - Heuristic scoring
+    
+    The grid is configurable: slot_minutes (e.g. 5/15/30) between
+    day_start and day_end, over one week of named days (horizon_weeks=1,
+    the default) or a rolling multi-week horizon of ISO-dated days
+    starting at start_date (default today).
+    
+    now fixes the reference time deadlines are measured from (default:
+    the wall clock when the scheduler is created), so a given input and
+    now always produce the same schedule.
+    
+    ordering picks the order flex tasks are placed in (one of ORDERINGS).
     """
     
-    def __init__(self):
-        self.days = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday"]
-        # Sunday is OFF by default
+    def __init__(self, max_nodes=20000, time_limit_ms=2000, seed=0,
+                 slot_minutes=30, day_start="06:00", day_end="24:00",
+                 horizon_weeks=1, start_date=None, now=None, ordering="priority"):
+        if ordering not in ORDERINGS:
+            raise ValueError(f"Unknown ordering '{ordering}'. Known: {', '.join(ORDERINGS)}")
+        self.ordering = ordering
         
+        self.slot_start = to_minutes(day_start)
+        self.slot_end = to_minutes(day_end)
+        self.slot_step = slot_minutes
         self.time_slots = self._generate_time_slots()
+        
+        # Sunday is OFF by default
+        self.now = now or datetime.now()
+        self.horizon_weeks = horizon_weeks
+        self.days, self.day_dates = self._generate_days(start_date or self.now.date())
+        self.day_weekdays = [_WEEKDAYS[d.weekday()].lower() for d in self.day_dates]
+        self._day_index = {day: index for index, day in enumerate(self.days)}
+        self.context = SolveContext(self.now, self.day_dates)
+        
+        self.full_mask = (1 << len(self.time_slots)) - 1
         self.schedule = {day: [] for day in self.days}
+        self.occupancy = {day: DayOccupancy() for day in self.days}
         
-    def _generate_time_slots(self):
-        """Generate 30-minute time slots from 06:00 to 24:00"""
-        slots = []
-        current = datetime.strptime("06:00", "%H:%M")
-        end = datetime.strptime("24:00", "%H:%M")
+        # Search budgets for mode="backtrack"
+        self.max_nodes = max_nodes
+        self.time_limit_ms = time_limit_ms
+        self.search_stats = None
+        
+        # Random seed for mode="anytime" and ordering="random" (fixed so results are repeatable)
+        self.seed = seed
+        self.local_search_stats = None
+        
+        # Filled by mode="optimal"
+        self.assignment_stats = None
         
-        while current < end:
-            slots.append(current.strftime("%H:%M"))
-            current += timedelta(minutes=30)
+        # Filled by the pre-check: task groups needing more time than is free
+        self.capacity_conflicts = []
         
-        return slots
+        # Instrumentation; a no-op unless solve(profile=True)
+        self.profile = NULL_PROFILE
+        
+        # Wall-clock cap for one solve (see solve(deadline=...))
+        self.deadline = None
+        self.deadline_reached = False
+    
+    def _generate_time_slots(self):
+        """Generate slot starts from day_start to day_end (minutes since midnight)"""
+        return list(range(self.slot_start, self.slot_end, self.slot_step))
     
-    def solve(self, tasks, global_constraints):
-        """Main solver function"""
+    def _generate_days(self, today):
+        """Schedule day keys and the calendar date each one falls on"""
+        if self.horizon_weeks == 1:
+            # Named weekdays, each on its next occurrence from today
+            dates = [today + timedelta(days=(d - today.weekday()) % 7) for d in range(6)]
+            return [_WEEKDAYS[d.weekday()] for d in dates], dates
         
-        # Separate fixed and flex tasks
-        fixed_tasks = [t for t in tasks if t["mode"] == "fixed"]
-        flex_tasks = [t for t in tasks if t["mode"] == "duration"]
+        dates = [today + timedelta(days=i) for i in range(7 * self.horizon_weeks)]
+        dates = [d for d in dates if d.weekday() != 6]
+        return [d.isoformat() for d in dates], dates
+    
+    def _day_matches(self, day_index, value):
+        """True if a weekday name ("monday") or ISO date refers to this day"""
+        value = (value or "").lower()
+        return value == self.day_weekdays[day_index] or value == self.days[day_index].lower()
+    
+    def _day_key(self, value):
+        """Schedule day key for a stored day value ("monday" / ISO date), or None"""
+        value = (value or "").lower()
+        for day in self.days:
+            if day.lower() == value:
+                return day
+        return None
+    
+    def _range_mask(self, lo, hi):
+        """Bitmask of the slots whose start minute lies in [lo, hi)"""
+        first = max(0, -((self.slot_start - lo) // self.slot_step))
+        last = min(len(self.time_slots), -((self.slot_start - hi) // self.slot_step))
+        if last <= first:
+            return 0
+        return ((1 << (last - first)) - 1) << first
+    
+    def solve(self, tasks, global_constraints, mode="greedy", time_budget_ms=None, profile=False, deadline=None):
+        """
+        Main solver function.
         
-        # Reset schedule
-        self.schedule = {day: [] for day in self.days}
-        self.global_constraints = global_constraints
+        mode="greedy" places flex tasks one by one in their best slot.
+        mode="backtrack" does the same, and if anything is left over runs
+        a budgeted backtracking search and keeps whichever places more.
+        mode="anytime" starts from the greedy placement and improves it
+        with local search until time_budget_ms has elapsed.
+        mode="optimal" solves flex placement as a max-weight assignment of
+        tasks to non-overlapping slot blocks and keeps it if it beats greedy.
+        
+        profile=True (or a SolverProfile) adds a "profile" block with
+        counters, rejections per constraint type, per-phase timings and
+        peak traced allocation.
+        
+        deadline (a time.time() value, so it means the same in every
+        process) caps the whole solve: greedy placement stops there and
+        fails the tasks it didn't get to, the matching / search / local
+        search phases stop early, and the result gets
+        "deadline_reached": True.
+        """
+        self.deadline = deadline
+        self.deadline_reached = False
+        if isinstance(profile, SolverProfile):
+            self.profile = profile
+        else:
+            self.profile = SolverProfile() if profile else NULL_PROFILE
+        prof = self.profile
+        prof.start()
+        try:
+            result = self._solve_phases(tasks, global_constraints, mode, time_budget_ms)
+        finally:
+            # Always: a profile left running keeps allocation tracing on process-wide
+            prof.stop()
+        if prof.enabled:
+            result["profile"] = prof.as_dict()
+        
+        return result
+    
+    def _solve_phases(self, tasks, global_constraints, mode, time_budget_ms):
+        """The body of solve(), run between profile start/stop"""
+        prof = self.profile
+        
+        with prof.phase("normalize"):
+            # Reset schedule
+            self._reset(global_constraints)
+            
+            # Convert "HH:MM" strings to minutes once, at the boundary
+            tasks = [self._normalize_task(t) for t in tasks]
+            
+            # Separate fixed and flex tasks
+            fixed_tasks = [t for t in tasks if t["mode"] == "fixed"]
+            flex_tasks = [t for t in tasks if t["mode"] == "duration"]
         
         # 1. Place fixed tasks first (they're non-negotiable)
         failed_fixed = []
-        for task in fixed_tasks:
-            if not self._place_fixed_task(task):
-                failed_fixed.append({
-                    "task_id": task["id"],
-                    "name": task["name"],
-                    "status": "FAILED_CONSTRAINTS",
-                    "reason": "Fixed time conflicts or violates constraints"
-                })
+        with prof.phase("fixed_placement"):
+            for task in fixed_tasks:
+                if not self._place_fixed_task(task):
+                    failed_fixed.append(self._failed_entry(
+                        task, "Fixed time conflicts or violates constraints"
+                    ))
+        
+        # Tasks that can't go anywhere fail now, before any search
+        with prof.phase("precheck"):
+            flex_tasks, doomed = self._precheck(flex_tasks)
         
         # 2. Sort flex tasks by priority and deadline
-        flex_tasks = self._sort_flex_tasks(flex_tasks)
+        with prof.phase("sort"):
+            flex_tasks = self._sort_flex_tasks(flex_tasks)
         
-        # 3. Try to place flex tasks using backtracking
-        failed_flex = []
-        for task in flex_tasks:
-            if not self._place_flex_task(task):
-                failed_flex.append({
-                    "task_id": task["id"],
-                    "name": task["name"],
-                    "status": "FAILED_CONSTRAINTS",
-                    "reason": "No valid time slot found that satisfies all constraints"
-                })
+        # Score every (task, day, slot) once; placement only does lookups
+        with prof.phase("scoring"):
+            self._build_scores(flex_tasks)
+        
+        # 3. Place flex tasks (greedy, optionally followed by search)
+        with prof.phase("flex_placement"):
+            if mode == "backtrack":
+                failed_flex = self._solve_backtracking(flex_tasks)
+            elif mode == "optimal":
+                failed_flex = self._solve_optimal(flex_tasks)
+            elif mode == "anytime":
+                failed_flex = self._solve_anytime(flex_tasks, time_budget_ms or self.time_limit_ms)
+            else:
+                failed_flex = self._place_greedy(flex_tasks)
         
         # 4. Build result
-        all_failed = failed_fixed + failed_flex
+        self._attach_capacity_causes(failed_flex)
+        all_failed = failed_fixed + doomed + failed_flex
+        
+        with prof.phase("format"):
+            result = {
+                "success": len(all_failed) == 0,
+                "schedule": self._format_schedule(),
+                "failed_tasks": all_failed,
+                "message": "Schedule generated successfully" if len(all_failed) == 0 
+                          else f"{len(all_failed)} tasks could not be scheduled"
+            }
+        if self.search_stats is not None:
+            result["search"] = self.search_stats
+        if self.local_search_stats is not None:
+            result["local_search"] = self.local_search_stats
+        if self.assignment_stats is not None:
+            result["assignment"] = self.assignment_stats
+        if self.capacity_conflicts:
+            result["capacity_conflicts"] = self.capacity_conflicts
+        if self.ignored_constraints:
+            result["ignored_constraints"] = self.ignored_constraints
+        if self.deadline_reached:
+            result["deadline_reached"] = True
+        
+        return result
+    
+    def _reset(self, global_constraints):
+        """Empty schedule + freshly compiled global constraints"""
+        # Dates and parsed deadlines for this solve
+        self.context = SolveContext(self.now, self.day_dates)
+        
+        self.schedule = {day: [] for day in self.days}
+        self.occupancy = {day: DayOccupancy() for day in self.days}
+        
+        # Running per-day totals for the daily limits (minutes booked, items)
+        self._day_minutes = [0] * len(self.days)
+        self._day_counts = [0] * len(self.days)
         
+        self.ignored_constraints = []
+        self.global_constraints = self._compile_constraints(GLOBAL, global_constraints)
+        self._compile_global_constraints()
+        self._task_mask_cache = {}
+        self._extra_scores = {}
+        self.search_stats = None
+        self.local_search_stats = None
+        self.assignment_stats = None
+        self.capacity_conflicts = []
+    
+    def _failed_entry(self, task, reason):
+        return {
+            "task_id": task["id"],
+            "name": task["name"],
+            "status": "FAILED_CONSTRAINTS",
+            "reason": reason
+        }
+    
+    def _normalize_task(self, task):
+        """Copy a task with its times converted to minutes and its constraints compiled"""
+        task = dict(task)
+        if task.get("start_time") is not None:
+            task["start_time"] = to_minutes(task["start_time"])
+        if task.get("end_time") is not None:
+            task["end_time"] = to_minutes(task["end_time"])
+        task["constraints"] = self._compile_constraints(TASK, task.get("constraints", []), task)
+        return task
+    
+    def _compile_constraints(self, scope, constraints, task=None):
+        """
+        Compile constraint dicts through the registry. Unknown types and
+        unusable values are skipped and reported in ignored_constraints.
+        """
+        compiled = []
+        for constraint in constraints:
+            try:
+                item = compile_constraint(scope, constraint)
+                reason = "unknown constraint type" if item is None else None
+            except (ValueError, TypeError, KeyError, AttributeError) as e:
+                item, reason = None, str(e) or type(e).__name__
+            
+            if item is None:
+                ignored = {"scope": scope, "type": constraint.get("type"), "reason": reason}
+                if task is not None:
+                    ignored["task_id"] = task.get("id")
+                self.ignored_constraints.append(ignored)
+                continue
+            compiled.append(item)
+        return compiled
+    
+    def _format_schedule(self):
+        """Convert the internal minute-based schedule to "HH:MM" strings"""
         return {
-            "success": len(all_failed) == 0,
-            "schedule": self.schedule,
-            "failed_tasks": all_failed,
-            "message": "Schedule generated successfully" if len(all_failed) == 0 
-                      else f"{len(all_failed)} tasks could not be scheduled"
+            day: [
+                {**entry, "start": to_label(entry["start"]), "end": to_label(entry["end"])}
+                for entry in entries
+            ]
+            for day, entries in self.schedule.items()
         }
     
     def _place_fixed_task(self, task):
-        """Place a fixed task at its specified time"""
-        day = task["day"].capitalize()
+        """
+        Place a fixed task at its specified time, on every schedule day it
+        names (a weekday recurs once per week of the horizon)
+        """
+        days = [day for index, day in enumerate(self.days) if self._day_matches(index, task["day"])]
         
-        if day not in self.days:
+        if not days:
             return False
         
         start_time = task["start_time"]
         end_time = task["end_time"]
         
-        # Check global constraints
-        if not self._check_global_constraints(day, start_time, end_time):
-            return False
-        
-        # Check task constraints
-        if not self._check_task_constraints(task, day, start_time, end_time):
-            return False
-        
-        # Check for overlaps
-        if self._has_overlap(day, start_time, end_time):
-            return False
+        for day in days:
+            # Check global constraints
+            if not self._check_global_constraints(day, start_time, end_time):
+                self.profile.reject("fixed:global")
+                return False
+            
+            # Check task constraints
+            if not self._check_task_constraints(task, day, start_time, end_time):
+                self.profile.reject("fixed:task")
+                return False
+            
+            # Check for overlaps
+            if self._has_overlap(day, start_time, end_time):
+                self.profile.reject("fixed:overlap")
+                return False
         
         # Place task
-        self.schedule[day].append({
+        for day in days:
+            self._assign(task, day, start_time, end_time, "fixed")
+        
+        return True
+    
+    def _assign(self, task, day, start_time, end_time, kind):
+        """Book [start_time, end_time) on a day for a task"""
+        entry = {
             "task_id": task["id"],
             "name": task["name"],
             "start": start_time,
             "end": end_time,
-            "type": "fixed",
+            "type": kind,
             "category": task.get("category")
-        })
+        }
+        self.occupancy[day].add(start_time, end_time)
+        self.schedule[day].append(entry)
+        
+        day_index = self._day_index[day]
+        self._day_minutes[day_index] += end_time - start_time
+        self._day_counts[day_index] += 1
+        return entry
+    
+    def _candidate_masks(self, task):
+        """Per-day mask of legal starts: global mask ∩ task mask ∩ free gaps"""
+        duration = task["duration"]
+        global_masks = self._global_masks_for(duration)
+        task_masks = self._task_masks(task)
+        
+        masks = []
+        for day_index, day in enumerate(self.days):
+            mask = global_masks[day_index] & task_masks[day_index]
+            if mask and self._hard_daily_limits and not self._day_has_room(day_index, duration):
+                mask = 0
+            if mask:
+                mask &= self._free_mask(day, duration)
+            masks.append(mask)
         
+        if self.profile.enabled:
+            self._profile_candidates(task, global_masks, masks)
+        return masks
+    
+    def _profile_candidates(self, task, global_masks, masks):
+        """Attribute every excluded candidate start to the constraint that removed it"""
+        prof = self.profile
+        slot_count = len(self.time_slots)
+        constraint_masks = self._task_constraint_masks(task)
+        
+        for day_index in range(len(self.days)):
+            prof.count("candidates_evaluated", slot_count)
+            remaining = global_masks[day_index]
+            reason = "disallowed_days" if self._day_windows[day_index] is None else "time_window"
+            prof.reject(reason, slot_count - remaining.bit_count())
+            
+            for ctype, allowed in constraint_masks:
+                kept = remaining & allowed[day_index]
+                prof.reject(ctype, remaining.bit_count() - kept.bit_count())
+                remaining = kept
+            
+            if self._hard_daily_limits and not self._day_has_room(day_index, task["duration"]):
+                prof.reject("daily_limit", remaining.bit_count())
+                remaining = 0
+            
+            prof.reject("overlap", remaining.bit_count() - masks[day_index].bit_count())
+            prof.count("candidates_feasible", masks[day_index].bit_count())
+    
+    def _place_greedy(self, flex_tasks):
+        """Place flex tasks in order, each in its best free slot"""
+        failed = []
+        for position, task in enumerate(flex_tasks):
+            if self._past_deadline():
+                failed.extend(
+                    self._failed_entry(t, "Time budget ran out before this task was placed")
+                    for t in flex_tasks[position:]
+                )
+                break
+            if not self._place_flex_task(task, self._score_rows[task["id"]]):
+                failed.append(self._failed_entry(
+                    task, "No valid time slot found that satisfies all constraints"
+                ))
+        return failed
+    
+    def _remaining_s(self):
+        """Seconds left before solve(deadline=...), infinite without one"""
+        if self.deadline is None:
+            return math.inf
+        return max(self.deadline - time.time(), 0.0)
+    
+    def _past_deadline(self):
+        if self.deadline is None or time.time() < self.deadline:
+            return False
+        self.deadline_reached = True
         return True
     
-    def _place_flex_task(self, task):
+    def _place_flex_task(self, task, row):
         """Try to place a flexible task in the best available slot"""
+        self.profile.count("flex_attempts")
+        masks = self._candidate_masks(task)
+        if not any(masks):
+            return False
+        
+        # Best feasible slot; argmax returns the first maximum, so the
+        # earliest day/slot wins ties
+        feasible = masks_to_bool(masks, len(self.time_slots))
+        scores = self._scores[row]
+        if self._soft_daily_limits:
+            scores = scores - self._day_penalties(task["duration"])[:, None]
+        scores = np.where(feasible, scores, -np.inf)
+        day_index, slot_index = np.unravel_index(scores.argmax(), scores.shape)
+        
+        # Place in best slot
+        start_time = self.time_slots[slot_index]
+        self._assign(task, self.days[day_index], start_time, start_time + task["duration"], "flex")
+        
+        return True
+    
+    def _task_masks(self, task):
+        """Compiled task masks, cached for the duration of a solve"""
+        masks = self._task_mask_cache.get(task["id"])
+        if masks is None:
+            masks = self._compile_task_masks(task)
+            self._task_mask_cache[task["id"]] = masks
+        return masks
+    
+    def _slot_index(self, start_time):
+        return (start_time - self.slot_start) // self.slot_step
+    
+    def _build_scores(self, flex_tasks):
+        """Precompute the (task, day, slot) score tensor for this solve"""
+        self._scores = build_score_table(flex_tasks, self.context, self.time_slots)
+        self._score_rows = {task["id"]: row for row, task in enumerate(flex_tasks)}
+    
+    def _scores_for(self, task):
+        """(day, slot) score matrix of a task, also for tasks outside the tensor"""
+        row = self._score_rows.get(task["id"])
+        if row is not None:
+            return self._scores[row]
+        
+        scores = self._extra_scores.get(task["id"])
+        if scores is None:
+            scores = build_score_table([task], self.context, self.time_slots)[0]
+            self._extra_scores[task["id"]] = scores
+        return scores
+    
+    # ==========================================================
+    # INFEASIBILITY PRE-CHECK
+    # ==========================================================
+    def _precheck(self, flex_tasks):
+        """
+        Cheap analysis once the fixed tasks are placed, before any search.
+        
+        - A flex task with no candidate start left can never be placed, so
+          it fails right away, naming the smallest set of constraints whose
+          masks don't intersect
+        - Capacity: the other tasks' minutes are compared with the most
+          free time they could possibly use, for all of them together and
+          per group of tasks with the same task constraints
+        
+        Returns (placeable tasks, failed entries for the doomed ones).
+        """
+        placeable = []
+        doomed = []
+        candidates = {}
+        for task in flex_tasks:
+            masks = self._candidate_masks(task)
+            if any(masks):
+                placeable.append(task)
+                candidates[task["id"]] = masks
+                continue
+            
+            conflict = self._minimal_conflict(self._mask_sources(task))
+            if len(conflict) == 1:
+                reason = f"No valid time slot: {conflict[0]} rules out every start"
+            else:
+                reason = f"No valid time slot: {' + '.join(conflict)} can't be satisfied together"
+            entry = self._failed_entry(task, reason)
+            entry["conflict"] = conflict
+            doomed.append(entry)
+        
+        self.profile.count("doomed_tasks", len(doomed))
+        self.capacity_conflicts = self._capacity_conflicts(placeable, candidates)
+        return placeable, doomed
+    
+    def _mask_sources(self, task):
+        """(name, per-day allowed-start masks) for everything that limits a task's starts"""
         duration = task["duration"]
+        sources = [("duration", [self._range_mask(self.slot_start, self.slot_end - duration + 1)] * len(self.days))]
         
-        # Generate candidate slots
-        candidates = []
+        for rule in self.global_constraints:
+            if isinstance(rule, DayWindow):
+                lo = 0 if rule.min_start is None else rule.min_start
+                hi = MINUTES_PER_DAY if rule.max_end is None else rule.max_end
+                window = self._range_mask(lo, hi - duration + 1)
+                sources.append((rule.type, [
+                    0 if weekday in rule.disallowed_days or day.lower() in rule.disallowed_days else window
+                    for day, weekday in zip(self.days, self.day_weekdays)
+                ]))
         
-        for day in self.days:
-            # Check if day is disallowed
-            if self._is_day_disallowed(day):
+        sources.extend(self._task_constraint_masks(task))
+        
+        if self._hard_daily_limits:
+            sources.append(("daily_limit", [
+                self.full_mask if self._day_has_room(day_index, duration) else 0
+                for day_index in range(len(self.days))
+            ]))
+        sources.append(("fixed_tasks", [self._free_mask(day, duration) for day in self.days]))
+        return sources
+    
+    def _minimal_conflict(self, sources):
+        """Names of the smallest set of sources whose masks have no start in common"""
+        for size in range(1, len(sources) + 1):
+            for combination in combinations(sources, size):
+                if not any(reduce(and_, day_masks) for day_masks in zip(*(masks for _, masks in combination))):
+                    return sorted({name for name, _ in combination})
+        return [name for name, _ in sources]
+    
+    def _capacity_conflicts(self, tasks, candidates):
+        """Task groups that need more minutes than could ever be free for them"""
+        groups = {}
+        for task in tasks:
+            if task["constraints"]:
+                groups.setdefault(tuple(self._task_masks(task)), []).append(task)
+        
+        # All tasks together (no constraint label), then each group; a group
+        # holding every task already is the all-tasks check, with its labels
+        checks = [
+            (sorted({c.type for task in group for c in task["constraints"]}), group)
+            for group in groups.values()
+        ]
+        if not any(len(group) == len(tasks) for _, group in checks):
+            checks.insert(0, ([], tasks))
+        
+        conflicts = []
+        for constraint_types, group in checks:
+            if not group:
                 continue
+            required = sum(task["duration"] for task in group)
+            available = self._coverage_minutes(group, candidates)
+            if required > available:
+                conflicts.append({
+                    "constraints": constraint_types,
+                    "task_ids": [task["id"] for task in group],
+                    "required_minutes": required,
+                    "available_minutes": available,
+                })
+        return conflicts
+    
+    def _attach_capacity_causes(self, failed):
+        """
+        Point failed flex tasks at the capacity conflict that explains them
+        (the smallest group holding the task) instead of the generic reason
+        """
+        if not self.capacity_conflicts:
+            return
+        by_task = {}
+        for conflict in sorted(self.capacity_conflicts, key=lambda c: -len(c["task_ids"])):
+            for task_id in conflict["task_ids"]:
+                by_task[task_id] = conflict
+        
+        for entry in failed:
+            conflict = by_task.get(entry["task_id"])
+            if conflict is None:
+                continue
+            entry["capacity_conflict"] = {
+                "constraints": conflict["constraints"],
+                "required_minutes": conflict["required_minutes"],
+                "available_minutes": conflict["available_minutes"],
+            }
+            if entry["reason"] == "No valid time slot found that satisfies all constraints":
+                scope = " + ".join(conflict["constraints"])
+                scope = f"tasks with {scope}" if scope else "all flex tasks"
+                entry["reason"] = (
+                    f"Not enough free time: {scope} need {conflict['required_minutes']} min, "
+                    f"at most {conflict['available_minutes']} min available"
+                )
+    
+    def _coverage_minutes(self, tasks, candidates):
+        """Upper bound on the minutes a set of tasks could occupy, from their candidate starts"""
+        width = -(-max(task["duration"] for task in tasks) // self.slot_step)
+        total = 0
+        for day_index in range(len(self.days)):
+            starts = 0
+            for task in tasks:
+                starts |= candidates[task["id"]][day_index]
+            
+            window = self._day_windows[day_index]
+            if window is None or not starts:
+                continue
+            covered = 0
+            for offset in range(width):
+                covered |= starts << offset
+            minutes = (covered & self._range_mask(*window)).bit_count() * self.slot_step
             
-            for slot in self.time_slots:
-                start_time = slot
-                end_time = self._add_minutes(start_time, duration)
+            if self._max_day_minutes is not None:
+                minutes = min(minutes, max(0, self._max_day_minutes - self._day_minutes[day_index]))
+            total += minutes
+        return total
+    
+    # ==========================================================
+    # BACKTRACKING SEARCH
+    # ==========================================================
+    def _solve_backtracking(self, flex_tasks):
+        """
+        Greedy first; if it leaves tasks out, run a budgeted MRV search
+        from the post-fixed state and keep the better of the two.
+        """
+        base_schedule = {day: list(entries) for day, entries in self.schedule.items()}
+        base_occupancy = {day: occ.copy() for day, occ in self.occupancy.items()}
+        base_totals = (list(self._day_minutes), list(self._day_counts))
+        domains = [self._candidate_masks(task) for task in flex_tasks]
+        
+        failed = self._place_greedy(flex_tasks)
+        if not failed:
+            return failed
+        return self._improve_by_search(flex_tasks, failed, domains, (base_schedule, base_occupancy, base_totals))
+    
+    def _improve_by_search(self, flex_tasks, failed, domains, base):
+        """
+        Budgeted MRV search from the post-fixed state (base: schedule,
+        occupancy, day totals; domains: candidate masks there). Its
+        assignment replaces the current placement, whose failures are
+        failed, if it places more tasks or scores higher.
+        """
+        base_schedule, base_occupancy, base_totals = base
+        candidates = [self._ordered_candidates(row, domain) for row, domain in enumerate(domains)]
+        assignment, search_score = self._backtrack_search(flex_tasks, domains, candidates, base_totals)
+        
+        current_key = (len(flex_tasks) - len(failed), self._flex_score())
+        if (len(assignment), search_score) <= current_key:
+            return failed
+        
+        # Search found a better schedule: rebuild from the post-fixed state
+        self.schedule = base_schedule
+        self.occupancy = base_occupancy
+        self._day_minutes, self._day_counts = base_totals
+        failed = []
+        for index, task in enumerate(flex_tasks):
+            if index not in assignment:
+                failed.append(self._failed_entry(
+                    task, "No valid time slot found that satisfies all constraints"
+                ))
+                continue
+            day_index, start_time = assignment[index]
+            self._assign(task, self.days[day_index], start_time, start_time + task["duration"], "flex")
+        return failed
+    
+    def _ordered_candidates(self, row, domain):
+        """All (day_index, slot_index, score) of a domain, best score first"""
+        day_indexes, slot_indexes = np.nonzero(masks_to_bool(domain, len(self.time_slots)))
+        scores = self._scores[row][day_indexes, slot_indexes]
+        
+        # Highest score first; earlier day/slot wins ties like the greedy pass
+        order = np.lexsort((slot_indexes, day_indexes, -scores))
+        return list(zip(
+            day_indexes[order].tolist(),
+            slot_indexes[order].tolist(),
+            scores[order].tolist(),
+        ))
+    
+    def _flex_score(self):
+        """Total slot score of the flex tasks currently in the schedule"""
+        total = 0
+        for day_index, day in enumerate(self.days):
+            for entry in self.schedule[day]:
+                row = self._score_rows.get(entry["task_id"])
+                if entry["type"] == "flex" and row is not None:
+                    total += self._scores.item(row, day_index, self._slot_index(entry["start"]))
+        return float(total)
+    
+    def _backtrack_search(self, flex_tasks, domains, candidates, base_totals):
+        """
+        Iterative DFS over flex tasks.
+        
+        - Variable ordering: MRV (fewest legal starts left), ties by sort order
+        - Value ordering: slot score, best first
+        - Forward checking: each placement clears the overlapping starts from
+          the other unassigned tasks' domains; a wiped-out domain prunes
+          the value immediately
+        - Hard daily limits: values on a day without room are skipped, using
+          running per-day totals that start from base_totals
+        
+        Returns the best assignment found within the node/time budget as
+        {task_index: (day_index, start_time)} plus its total score.
+        """
+        deadline = time.perf_counter() + min(self.time_limit_ms / 1000.0, self._remaining_s())
+        durations = [task["duration"] for task in flex_tasks]
+        sizes = [sum(mask.bit_count() for mask in domain) for domain in domains]
+        day_minutes, day_counts = list(base_totals[0]), list(base_totals[1])
+        
+        # Tasks that can't go anywhere are doomed whatever we do
+        unassigned = {i for i, size in enumerate(sizes) if size > 0}
+        
+        best = ({}, 0)
+        nodes = 0
+        backtracks = 0
+        complete = False
+        
+        # frame = [task_index, values, next_position, domains_before, sizes_before, value, score]
+        frames = []
+        current_domains = domains
+        current_sizes = sizes
+        descend = True
+        
+        while nodes < self.max_nodes and time.perf_counter() < deadline:
+            if descend:
+                if not unassigned:
+                    complete = True
+                    break
                 
-                # Check if end time is valid
-                if end_time > "24:00":
+                task_index = min(unassigned, key=lambda i: (current_sizes[i], i))
+                domain = current_domains[task_index]
+                values = [c for c in candidates[task_index] if domain[c[0]] >> c[1] & 1]
+                unassigned.discard(task_index)
+                frames.append([task_index, values, 0, current_domains, current_sizes, None, 0])
+            
+            frame = frames[-1]
+            task_index, values, position, domains_before, sizes_before = frame[:5]
+            
+            if frame[5] is not None:
+                # Back from a dead end below: release this frame's current value
+                day_minutes[frame[5][0]] -= durations[task_index]
+                day_counts[frame[5][0]] -= 1
+                frame[5] = None
+            
+            pruned = None
+            while pruned is None and position < len(values):
+                value = values[position]
+                position += 1
+                nodes += 1
+                if self._hard_daily_limits and not self._day_has_room(
+                    value[0], durations[task_index], day_minutes, day_counts
+                ):
                     continue
-                
-                # Check constraints
-                if not self._check_global_constraints(day, start_time, end_time):
+                start_time = self.time_slots[value[1]]
+                pruned = self._forward_check(
+                    domains_before, sizes_before, unassigned, durations,
+                    value[0], start_time, start_time + durations[task_index]
+                )
+            frame[2] = position
+            
+            if pruned is None:
+                # Dead end: keep the best partial assignment so far, then backtrack
+                best = self._better_assignment(best, frames[:-1])
+                frames.pop()
+                unassigned.add(task_index)
+                backtracks += 1
+                if not frames:
+                    break
+                descend = False
+                continue
+            
+            frame[5] = value
+            frame[6] = (frames[-2][6] if len(frames) > 1 else 0) + value[2]
+            day_minutes[value[0]] += durations[task_index]
+            day_counts[value[0]] += 1
+            current_domains, current_sizes = pruned
+            descend = True
+        
+        # Complete solution, or the budget ran out part-way down a branch
+        best = self._better_assignment(best, [f for f in frames if f[5] is not None])
+        
+        self.profile.count("search_nodes", nodes)
+        self.profile.count("backtracks", backtracks)
+        self.search_stats = {
+            "nodes": nodes,
+            "backtracks": backtracks,
+            "complete": complete,
+            "budget_exhausted": not complete and bool(frames),
+        }
+        return best
+    
+    def _better_assignment(self, best, frames):
+        """Pick between the best assignment so far and the one on a frame stack"""
+        score = frames[-1][6] if frames else 0
+        if (len(frames), score) <= (len(best[0]), best[1]):
+            return best
+        
+        assignment = {
+            frame[0]: (frame[5][0], self.time_slots[frame[5][1]])
+            for frame in frames
+        }
+        return assignment, score
+    
+    def _forward_check(self, domains, sizes, unassigned, durations, day_index, start_time, end_time):
+        """
+        Remove starts overlapping [start_time, end_time) on a day from every
+        unassigned task. Returns new (domains, sizes), or None on a wipe-out.
+        Untouched tasks share their domain lists with the parent state.
+        """
+        new_domains = None
+        new_sizes = None
+        clear_masks = {}
+        
+        for other in unassigned:
+            mask = domains[other][day_index]
+            if not mask:
+                continue
+            
+            duration = durations[other]
+            clear = clear_masks.get(duration)
+            if clear is None:
+                clear = self._range_mask(start_time - duration + 1, end_time)
+                clear_masks[duration] = clear
+            
+            removed = mask & clear
+            if not removed:
+                continue
+            
+            size = sizes[other] - removed.bit_count()
+            if size == 0:
+                return None
+            
+            if new_domains is None:
+                new_domains = list(domains)
+                new_sizes = list(sizes)
+            day_masks = list(domains[other])
+            day_masks[day_index] = mask & ~clear
+            new_domains[other] = day_masks
+            new_sizes[other] = size
+        
+        if new_domains is None:
+            return domains, sizes
+        return new_domains, new_sizes
+    
+    # ==========================================================
+    # OPTIMAL ASSIGNMENT
+    # ==========================================================
+    def _solve_optimal(self, flex_tasks):
+        """
+        Greedy first, then a max-weight assignment from the post-fixed
+        state; keeps whichever places more tasks, then scores higher
+        (the anytime objective). Task priority only orders the greedy pass.
+        
+        The matching is exact only when every task fits in one slot (see
+        _place_by_matching): longer tasks start on tile boundaries only.
+        So if tasks spanning several slots are left over, the budgeted
+        backtracking search (mode="backtrack") gets a go as well.
+        """
+        base_schedule = {day: list(entries) for day, entries in self.schedule.items()}
+        base_occupancy = {day: occ.copy() for day, occ in self.occupancy.items()}
+        base_totals = (list(self._day_minutes), list(self._day_counts))
+        domains = [self._candidate_masks(task) for task in flex_tasks]
+        base = (
+            {day: list(entries) for day, entries in base_schedule.items()},
+            {day: occ.copy() for day, occ in base_occupancy.items()},
+            (list(base_totals[0]), list(base_totals[1])),
+        )
+        
+        greedy_failed = self._place_greedy(flex_tasks)
+        greedy_key = (len(flex_tasks) - len(greedy_failed), self._flex_score())
+        greedy_state = (self.schedule, self.occupancy, self._day_minutes, self._day_counts)
+        
+        if self._past_deadline():
+            return greedy_failed
+        
+        self.schedule = base_schedule
+        self.occupancy = base_occupancy
+        self._day_minutes, self._day_counts = base_totals
+        try:
+            failed = self._place_by_matching(flex_tasks)
+        except TimeoutError:
+            self.deadline_reached = True
+            self.schedule, self.occupancy, self._day_minutes, self._day_counts = greedy_state
+            return greedy_failed
+        matching_key = (len(flex_tasks) - len(failed), self._flex_score())
+        
+        self.assignment_stats = {
+            "greedy": {"placed": greedy_key[0], "score": greedy_key[1]},
+            "matching": {"placed": matching_key[0], "score": matching_key[1]},
+            "used": "matching" if matching_key > greedy_key else "greedy",
+        }
+        if matching_key <= greedy_key:
+            self.schedule, self.occupancy, self._day_minutes, self._day_counts = greedy_state
+            failed = greedy_failed
+        
+        multi_slot = any(task["duration"] > self.slot_step for task in flex_tasks)
+        if failed and multi_slot and not self._past_deadline():
+            searched = self._improve_by_search(flex_tasks, failed, domains, base)
+            if searched is not failed:
+                self.assignment_stats["used"] = "search"
+            failed = searched
+        return failed
+    
+    def _place_by_matching(self, flex_tasks):
+        """
+        Flex tasks are grouped by how many slots they span, shortest first
+        (the objective counts placed tasks before score, and short tasks
+        leave the most room for the rest). For each group, every day's free time is cut into non-overlapping
+        tiles of that many slots, so any one-task-per-tile assignment is
+        overlap-free. A (task, tile) pair the task's candidate masks allow
+        weighs _PLACEMENT_WEIGHT + slot score, and the Hungarian algorithm
+        picks the heaviest matching. With single-slot tasks the tiles are
+        the slots and the matching is optimal; longer tasks only start on
+        tile boundaries, so greedy then fills in what the matching left.
+        """
+        groups = {}
+        for row, task in enumerate(flex_tasks):
+            width = -(-task["duration"] // self.slot_step)
+            groups.setdefault(width, []).append(row)
+        
+        matched = set()
+        for width in sorted(groups):
+            rows = groups[width]
+            tiles = self._tiles(width)
+            if not tiles:
+                continue
+            tile_days = np.array([day_index for day_index, _ in tiles])
+            tile_slots = np.array([slot_index for _, slot_index in tiles])
+            
+            weights = np.zeros((len(rows), len(tiles)))
+            for i, row in enumerate(rows):
+                masks = self._candidate_masks(flex_tasks[row])
+                allowed = masks_to_bool(masks, len(self.time_slots))[tile_days, tile_slots]
+                weights[i] = np.where(allowed, _PLACEMENT_WEIGHT + self._scores[row][tile_days, tile_slots], 0.0)
+            
+            pairs = max_weight_assignment(weights, deadline=self.deadline)
+            self.profile.count("matching_pairs", len(pairs))
+            
+            # Heaviest pairs first: a hard daily limit can still turn one down
+            for i, j in sorted(pairs, key=lambda pair: (-weights[pair], pair)):
+                task = flex_tasks[rows[i]]
+                day_index, slot_index = tiles[j]
+                if not self._fits_at(task, day_index, slot_index):
                     continue
-                
-                if not self._check_task_constraints(task, day, start_time, end_time):
+                start_time = self.time_slots[slot_index]
+                self._assign(task, self.days[day_index], start_time, start_time + task["duration"], "flex")
+                matched.add(rows[i])
+        
+        failed = []
+        for row, task in enumerate(flex_tasks):
+            if row not in matched and not self._place_flex_task(task, row):
+                failed.append(self._failed_entry(
+                    task, "No valid time slot found that satisfies all constraints"
+                ))
+        return failed
+    
+    def _tiles(self, width):
+        """(day_index, slot_index) of non-overlapping free blocks of width slots, packed per day"""
+        span = width * self.slot_step
+        global_masks = self._global_masks_for(span)
+        tiles = []
+        for day_index, day in enumerate(self.days):
+            starts = global_masks[day_index] & self._free_mask(day, span)
+            while starts:
+                slot_index = (starts & -starts).bit_length() - 1
+                tiles.append((day_index, slot_index))
+                # Next tile starts after this one ends
+                starts &= ~((1 << (slot_index + width)) - 1)
+        return tiles
+    
+    # ==========================================================
+    # ANYTIME LOCAL SEARCH
+    # ==========================================================
+    def _solve_anytime(self, flex_tasks, time_budget_ms):
+        """
+        Greedy placement, then simulated annealing over relocate / swap /
+        insert / eject moves until the wall-clock budget runs out.
+        The best placement seen is what ends up in the schedule.
+        
+        Objective = placed tasks * _PLACEMENT_WEIGHT + total slot score.
+        """
+        budget = max(min(time_budget_ms / 1000.0, self._remaining_s()), 1e-3)
+        deadline = time.perf_counter() + budget
+        self._place_greedy(flex_tasks)
+        
+        # row -> (day_index, slot_index)
+        placements = {}
+        for day_index, day in enumerate(self.days):
+            for entry in self.schedule[day]:
+                row = self._score_rows.get(entry["task_id"])
+                if entry["type"] == "flex" and row is not None:
+                    placements[row] = (day_index, self._slot_index(entry["start"]))
+        
+        current = self._objective(placements)
+        initial = current
+        best = current
+        best_placements = dict(placements)
+        iterations = 0
+        rng = random.Random(self.seed)
+        
+        while flex_tasks:
+            now = time.perf_counter()
+            if now >= deadline:
+                break
+            iterations += 1
+            
+            # Linear cooling down to (almost) pure hill climbing
+            temperature = _INITIAL_TEMPERATURE * (deadline - now) / budget + 0.01
+            current += self._local_move(flex_tasks, placements, rng, temperature)
+            
+            if current > best:
+                best = current
+                best_placements = dict(placements)
+        
+        self._apply_flex_placements(flex_tasks, placements, best_placements)
+        self.profile.count("local_search_iterations", iterations)
+        self.local_search_stats = {
+            "objective": best,
+            "initial_objective": initial,
+            "iterations": iterations,
+        }
+        
+        return [
+            self._failed_entry(task, "No valid time slot found that satisfies all constraints")
+            for row, task in enumerate(flex_tasks)
+            if row not in best_placements
+        ]
+    
+    def _objective(self, placements):
+        total = len(placements) * _PLACEMENT_WEIGHT
+        for row, (day_index, slot_index) in placements.items():
+            total += self._scores.item(row, day_index, slot_index)
+        return total
+    
+    def _local_move(self, flex_tasks, placements, rng, temperature):
+        """Try one random move; apply it if accepted and return the objective delta"""
+        row = rng.randrange(len(flex_tasks))
+        
+        if row not in placements:
+            return self._move_insert(flex_tasks, placements, row, rng, temperature)
+        if len(placements) > 1 and rng.random() < 0.3:
+            other = rng.choice(list(placements))
+            if other != row:
+                return self._move_swap(flex_tasks, placements, row, other, rng, temperature)
+        return self._move_relocate(flex_tasks, placements, row, rng, temperature)
+    
+    def _accept(self, delta, rng, temperature):
+        return delta >= 0 or rng.random() < math.exp(delta / temperature)
+    
+    def _book(self, flex_tasks, row, day_index, slot_index):
+        start_time = self.time_slots[slot_index]
+        self.occupancy[self.days[day_index]].add(start_time, start_time + flex_tasks[row]["duration"])
+        self._day_minutes[day_index] += flex_tasks[row]["duration"]
+        self._day_counts[day_index] += 1
+    
+    def _unbook(self, flex_tasks, row, day_index, slot_index):
+        start_time = self.time_slots[slot_index]
+        self.occupancy[self.days[day_index]].remove(start_time, start_time + flex_tasks[row]["duration"])
+        self._day_minutes[day_index] -= flex_tasks[row]["duration"]
+        self._day_counts[day_index] -= 1
+    
+    def _random_start(self, masks, rng):
+        """Uniformly random (day_index, slot_index) out of per-day masks"""
+        days = [day_index for day_index, mask in enumerate(masks) if mask]
+        if not days:
+            return None
+        day_index = rng.choice(days)
+        mask = masks[day_index]
+        bits = []
+        while mask:
+            low_bit = mask & -mask
+            mask ^= low_bit
+            bits.append(low_bit.bit_length() - 1)
+        return day_index, rng.choice(bits)
+    
+    def _best_start(self, scores, masks):
+        """Highest-scoring (day_index, slot_index) out of per-day masks"""
+        if not any(masks):
+            return None
+        scores = np.where(masks_to_bool(masks, len(self.time_slots)), scores, -np.inf)
+        day_index, slot_index = np.unravel_index(scores.argmax(), scores.shape)
+        return int(day_index), int(slot_index)
+    
+    def _move_relocate(self, flex_tasks, placements, row, rng, temperature):
+        """Move a placed task to a random legal start"""
+        old = placements[row]
+        self._unbook(flex_tasks, row, *old)
+        
+        new = self._random_start(self._candidate_masks(flex_tasks[row]), rng)
+        delta = 0
+        if new is not None and new != old:
+            delta = self._scores.item(row, *new) - self._scores.item(row, *old)
+            if self._accept(delta, rng, temperature):
+                placements[row] = new
+                self._book(flex_tasks, row, *new)
+                return delta
+        
+        self._book(flex_tasks, row, *old)
+        return 0
+    
+    def _move_swap(self, flex_tasks, placements, row, other, rng, temperature):
+        """Exchange the starts of two placed tasks when both still fit"""
+        pos_a = placements[row]
+        pos_b = placements[other]
+        self._unbook(flex_tasks, row, *pos_a)
+        self._unbook(flex_tasks, other, *pos_b)
+        
+        if self._fits_at(flex_tasks[row], *pos_b):
+            self._book(flex_tasks, row, *pos_b)
+            if self._fits_at(flex_tasks[other], *pos_a):
+                delta = (
+                    self._scores.item(row, *pos_b) + self._scores.item(other, *pos_a)
+                    - self._scores.item(row, *pos_a) - self._scores.item(other, *pos_b)
+                )
+                if self._accept(delta, rng, temperature):
+                    self._book(flex_tasks, other, *pos_a)
+                    placements[row] = pos_b
+                    placements[other] = pos_a
+                    return delta
+            self._unbook(flex_tasks, row, *pos_b)
+        
+        self._book(flex_tasks, row, *pos_a)
+        self._book(flex_tasks, other, *pos_b)
+        return 0
+    
+    def _move_insert(self, flex_tasks, placements, row, rng, temperature):
+        """
+        Place an unplaced task. If nothing is free, evict a random task
+        from a day the unplaced one may use and try to re-home the evictee.
+        """
+        task = flex_tasks[row]
+        new = self._best_start(self._scores[row], self._candidate_masks(task))
+        if new is not None:
+            placements[row] = new
+            self._book(flex_tasks, row, *new)
+            return _PLACEMENT_WEIGHT + self._scores.item(row, *new)
+        
+        # Eject: pick a victim on one of the days this task is allowed on
+        allowed = self._global_masks_for(task["duration"])
+        task_masks = self._task_masks(task)
+        days = {d for d in range(len(self.days)) if allowed[d] & task_masks[d]}
+        victims = [r for r, (d, _) in placements.items() if d in days]
+        if not victims:
+            return 0
+        
+        victim = rng.choice(victims)
+        victim_old = placements[victim]
+        self._unbook(flex_tasks, victim, *victim_old)
+        
+        new = self._best_start(self._scores[row], self._candidate_masks(task))
+        if new is None:
+            self._book(flex_tasks, victim, *victim_old)
+            return 0
+        self._book(flex_tasks, row, *new)
+        
+        victim_new = self._best_start(self._scores[victim], self._candidate_masks(flex_tasks[victim]))
+        delta = self._scores.item(row, *new) - self._scores.item(victim, *victim_old)
+        if victim_new is not None:
+            delta += _PLACEMENT_WEIGHT + self._scores.item(victim, *victim_new)
+        
+        if not self._accept(delta, rng, temperature):
+            self._unbook(flex_tasks, row, *new)
+            self._book(flex_tasks, victim, *victim_old)
+            return 0
+        
+        placements[row] = new
+        del placements[victim]
+        if victim_new is not None:
+            placements[victim] = victim_new
+            self._book(flex_tasks, victim, *victim_new)
+        return delta
+    
+    def _fits_at(self, task, day_index, slot_index):
+        """Check constraints and occupancy for one specific start"""
+        bit = 1 << slot_index
+        if not (self._global_masks_for(task["duration"])[day_index] & self._task_masks(task)[day_index] & bit):
+            return False
+        if self._hard_daily_limits and not self._day_has_room(day_index, task["duration"]):
+            return False
+        start_time = self.time_slots[slot_index]
+        self.profile.count("overlap_checks")
+        return self.occupancy[self.days[day_index]].fits(start_time, start_time + task["duration"])
+    
+    def _apply_flex_placements(self, flex_tasks, current, placements):
+        """Replace the flex part of the schedule with the given placements"""
+        for row, position in current.items():
+            self._unbook(flex_tasks, row, *position)
+        for day in self.days:
+            self.schedule[day] = [entry for entry in self.schedule[day] if entry["type"] != "flex"]
+        
+        for row, task in enumerate(flex_tasks):
+            if row in placements:
+                day_index, slot_index = placements[row]
+                start_time = self.time_slots[slot_index]
+                self._assign(task, self.days[day_index], start_time, start_time + task["duration"], "flex")
+    
+    # ==========================================================
+    # INCREMENTAL REPAIR
+    # ==========================================================
+    def repair(self, tasks, global_constraints, current_schedule, changed_task_ids):
+        """
+        Warm-start from an existing schedule and re-place only what changed.
+        
+        current_schedule is a list of {"task_id", "day", "start", "end"}
+        (the persisted rows); changed_task_ids are the tasks touched by the
+        edit. Every other placement is kept as long as it still satisfies
+        the (possibly changed) constraints and doesn't collide with another
+        kept item. Affected tasks -- changed, invalidated, or not placed
+        yet -- go in greedily; if one doesn't fit, a single kept flex item
+        may be moved elsewhere to make room.
+        
+        Returns the usual solve() result plus a "repair" block with the
+        ids of the tasks whose placement changed.
+        """
+        changed = set(changed_task_ids)
+        self.profile = NULL_PROFILE
+        self._reset(global_constraints)
+        tasks = [self._normalize_task(t) for t in tasks]
+        tasks_by_id = {t["id"]: t for t in tasks}
+        self._build_scores([])
+        
+        # task_id -> [(day, start, end)]; fixed tasks recur on multi-week horizons
+        previous = {}
+        for item in current_schedule:
+            previous.setdefault(item["task_id"], []).append(
+                (self._day_key(item["day"]), to_minutes(item["start"]), to_minutes(item["end"]))
+            )
+        
+        # 1. Keep still-valid placements of unchanged tasks (fixed ones first)
+        kept = set()
+        for task_id, placements in sorted(
+            previous.items(), key=lambda kv: tasks_by_id.get(kv[0], {}).get("mode") != "fixed"
+        ):
+            task = tasks_by_id.get(task_id)
+            if task is None or task_id in changed:
+                continue
+            if self._placements_valid(task, placements):
+                for day, start_time, end_time in placements:
+                    self._assign(task, day, start_time, end_time, "fixed" if task["mode"] == "fixed" else "flex")
+                kept.add(task_id)
+        
+        # 2. Everything else is affected: changed, invalidated, or never placed
+        affected = [t for t in tasks if t["id"] not in kept]
+        
+        failed = []
+        for task in affected:
+            if task["mode"] == "fixed" and not self._place_fixed_task(task):
+                failed.append(self._failed_entry(task, "Fixed time conflicts or violates constraints"))
+        
+        flex_affected = self._sort_flex_tasks([t for t in affected if t["mode"] == "duration"])
+        self._build_scores(flex_affected)
+        
+        movable = {task_id for task_id in kept if tasks_by_id[task_id]["mode"] == "duration"}
+        moved = set()
+        for row, task in enumerate(flex_affected):
+            if self._place_flex_task(task, row):
+                continue
+            victim_id = self._place_by_eviction(task, movable, tasks_by_id)
+            if victim_id is None:
+                failed.append(self._failed_entry(
+                    task, "No valid time slot found that satisfies all constraints"
+                ))
+                continue
+            movable.discard(victim_id)
+            moved.add(victim_id)
+        
+        # 3. Report which tasks ended up somewhere else than before
+        current = {}
+        for day, entries in self.schedule.items():
+            for entry in entries:
+                current.setdefault(entry["task_id"], []).append((day, entry["start"], entry["end"]))
+        for task in affected:
+            if sorted(current.get(task["id"], [])) != sorted(previous.get(task["id"], [])):
+                moved.add(task["id"])
+        removed = [task_id for task_id in previous if task_id not in current]
+        
+        return {
+            "success": len(failed) == 0,
+            "schedule": self._format_schedule(),
+            "failed_tasks": failed,
+            "message": "Schedule repaired successfully" if len(failed) == 0
+                      else f"{len(failed)} tasks could not be scheduled",
+            "repair": {
+                "kept": len(kept) - len(moved & kept),
+                "moved_task_ids": sorted(task_id for task_id in moved if task_id in current),
+                "removed_task_ids": sorted(removed),
+            },
+        }
+    
+    def _placements_valid(self, task, placements):
+        """All stored placements of a task are still valid, and complete"""
+        if task["mode"] == "fixed":
+            expected = [day for index, day in enumerate(self.days) if self._day_matches(index, task.get("day"))]
+            if sorted(day for day, _, _ in placements) != sorted(expected):
+                return False
+        elif len(placements) != 1:
+            return False
+        return all(self._placement_valid(task, *placement) for placement in placements)
+    
+    def _placement_valid(self, task, day, start_time, end_time):
+        """Check an existing placement against the current constraints and schedule"""
+        if day not in self._day_index:
+            return False
+        
+        if task["mode"] == "fixed":
+            return (
+                self._day_matches(self._day_index[day], task.get("day"))
+                and start_time == task["start_time"]
+                and end_time == task["end_time"]
+                and self._check_global_constraints(day, start_time, end_time)
+                and self._check_task_constraints(task, day, start_time, end_time)
+                and not self._has_overlap(day, start_time, end_time)
+            )
+        
+        slot_index = self._slot_index(start_time)
+        return (
+            end_time - start_time == task["duration"]
+            and self.slot_start <= start_time
+            and (start_time - self.slot_start) % self.slot_step == 0
+            and slot_index < len(self.time_slots)
+            and self._fits_at(task, self._day_index[day], slot_index)
+        )
+    
+    def _place_by_eviction(self, task, movable, tasks_by_id):
+        """
+        Make room for a task by moving exactly one movable flex item.
+        Returns the moved task id, or None (schedule untouched) if no single
+        move helps.
+        """
+        duration = task["duration"]
+        allowed = self._global_masks_for(duration)
+        task_masks = self._task_masks(task)
+        
+        for day_index, day in enumerate(self.days):
+            day_allowed = allowed[day_index] & task_masks[day_index]
+            if not day_allowed:
+                continue
+            
+            for entry in list(self.schedule[day]):
+                if entry["type"] != "flex" or entry["task_id"] not in movable:
                     continue
                 
-                # Check overlap
-                if self._has_overlap(day, start_time, end_time):
-                    continue
+                victim = tasks_by_id[entry["task_id"]]
+                self._unassign(day, entry)
                 
-                # Calculate score for this slot
-                score = self._calculate_slot_score(task, day, start_time, end_time)
+                masks = [0] * len(self.days)
+                if self._day_has_room(day_index, duration):
+                    masks[day_index] = day_allowed & self._free_mask(day, duration)
+                start = self._best_start(self._scores_for(task), masks)
                 
-                candidates.append({
-                    "day": day,
-                    "start": start_time,
-                    "end": end_time,
-                    "score": score
-                })
-        
-        if not candidates:
-            return False
-        
-        # Sort by score (higher is better)
-        candidates.sort(key=lambda x: x["score"], reverse=True)
+                if start is not None:
+                    start_time = self.time_slots[start[1]]
+                    placed = self._assign(task, day, start_time, start_time + duration, "flex")
+                    
+                    victim_start = self._best_start(self._scores_for(victim), self._candidate_masks(victim))
+                    if victim_start is not None:
+                        victim_time = self.time_slots[victim_start[1]]
+                        self._assign(
+                            victim, self.days[victim_start[0]],
+                            victim_time, victim_time + victim["duration"], "flex"
+                        )
+                        return victim["id"]
+                    
+                    self._unassign(day, placed)
+                
+                # Put the victim back where it was
+                self._assign(victim, day, entry["start"], entry["end"], "flex")
         
-        # Place in best slot
-        best = candidates[0]
-        self.schedule[best["day"]].append({
-            "task_id": task["id"],
-            "name": task["name"],
-            "start": best["start"],
-            "end": best["end"],
-            "type": "flex",
-            "category": task.get("category")
-        })
+        return None
+    
+    def _unassign(self, day, entry):
+        self.occupancy[day].remove(entry["start"], entry["end"])
+        self.schedule[day].remove(entry)
         
-        return True
+        day_index = self._day_index[day]
+        self._day_minutes[day_index] -= entry["end"] - entry["start"]
+        self._day_counts[day_index] -= 1
     
     def _sort_flex_tasks(self, tasks):
-        """Sort flex tasks by priority and deadline"""
+        """
+        Order flex tasks for placement, by self.ordering:
+        - "priority" (default): priority, then deadline urgency
+        - "deadline": earliest deadline first, then priority
+        - "longest": longest duration first, then priority
+        - "random": shuffled with self.seed
+        """
+        if self.ordering == "random":
+            tasks = list(tasks)
+            random.Random(self.seed).shuffle(tasks)
+            return tasks
+        if self.ordering == "deadline":
+            return sorted(tasks, key=self._deadline_first_key)
+        if self.ordering == "longest":
+            return sorted(tasks, key=lambda task: (-task["duration"], -task.get("priority", 3)))
+        
         def sort_key(task):
             # Priority (higher first)
             priority_score = task.get("priority", 3) * 100
             
             # Deadline urgency (earlier first)
             deadline_score = 0
-            if "deadline" in task:
-                try:
-                    deadline_date = datetime.strptime(task["deadline"]["date"], "%Y-%m-%d").date()
-                    days_until = (deadline_date - date.today()).days
-                    deadline_score = max(0, 100 - days_until)  # Closer deadline = higher score
-                except:
-                    deadline_score = 0
+            deadline = self.context.deadline(task)
+            if deadline is not None:
+                days_until = self.context.days_until(deadline)
+                deadline_score = max(0, 100 - days_until)  # Closer deadline = higher score
             
             return -(priority_score + deadline_score)  # Negative for descending order
         
         return sorted(tasks, key=sort_key)
     
+    def _deadline_first_key(self, task):
+        deadline = self.context.deadline(task)
+        if deadline is None:
+            return (1, 0, 0, -task.get("priority", 3))
+        return (0, deadline.ordinal, deadline.minute, -task.get("priority", 3))
+    
     def _calculate_slot_score(self, task, day, start_time, end_time):
-        """Calculate how good a time slot is for this task"""
+        """
+        Calculate how good a time slot is for this task.
+        
+        Scalar reference; solve() uses the equivalent vectorized tensor
+        from services/slot_scoring.py.
+        """
         score = 100  # Base score
         
         # Preferred time bonus
-        preferred_times = task.get("preferred_time", [])
-        hour = int(start_time.split(":")[0])
+        preferred_times = task.get("preferred_time") or []
+        hour = start_time // 60
         
         if "morning" in preferred_times and 6 <= hour < 12:
             score += 20
@@ -219,122 +1484,135 @@ class CSPScheduler:
             score -= 20
         
         # Prefer earlier in the week if no deadline
+        day_index = self._day_index[day]
         if "deadline" not in task:
-            day_index = self.days.index(day)
             score += (6 - day_index) * 5
         
         # Deadline proximity bonus
-        if "deadline" in task:
-            try:
-                deadline_date = datetime.strptime(task["deadline"]["date"], "%Y-%m-%d").date()
-                task_day_index = self.days.index(day)
-                
-                # Estimate what date this day is
-                today = date.today()
-                current_weekday = today.weekday()  # 0=Monday
-                days_to_task_day = (task_day_index - current_weekday) % 7
-                task_actual_date = today + timedelta(days=days_to_task_day)
-                
-                days_before_deadline = (deadline_date - task_actual_date).days
-                
-                if days_before_deadline < 0:
-                    score -= 100  # Past deadline
-                elif days_before_deadline == 0:
-                    score += 50  # On deadline day
-                elif days_before_deadline <= 2:
-                    score += 30  # Close to deadline
-                
-            except:
-                pass
+        deadline = self.context.deadline(task)
+        if deadline is not None:
+            days_before_deadline = deadline.ordinal - self.context.day_ordinals[day_index]
+            
+            if days_before_deadline < 0:
+                score -= 100  # Past deadline
+            elif days_before_deadline == 0:
+                score += 50  # On deadline day
+            elif days_before_deadline <= 2:
+                score += 30  # Close to deadline
         
         return score
     
-    def _check_global_constraints(self, day, start_time, end_time):
-        """Check if placement violates global constraints"""
-        for constraint in self.global_constraints:
-            ctype = constraint["type"]
-            value = constraint["value"]
-            
-            # Max end time
-            if ctype == "max_end_time":
-                if end_time > value.get("time", "23:00"):
-                    return False
-            
-            # Min start time
-            if ctype == "min_start_time":
-                if start_time < value.get("time", "06:00"):
-                    return False
-            
-            # Disallowed days
-            if ctype == "disallowed_days":
-                if day.lower() in [d.lower() for d in value]:
-                    return False
-            
-            # Max daily duration (soft constraint - we'll allow it)
-            # Max tasks per day (soft constraint - we'll allow it)
+    def _compile_global_constraints(self):
+        """
+        Compile global constraints once per solve into a per-day
+        (min_start, max_end) window; disallowed days get None.
+        """
+        min_start = 0
+        max_end = MINUTES_PER_DAY
+        disallowed = set()
+        
+        # Hard daily limits are enforced by placement, soft ones only score
+        self._max_day_minutes = None
+        self._max_day_tasks = None
+        self._soft_daily_limits = []
         
+        for rule in self.global_constraints:
+            if isinstance(rule, DailyLimit):
+                if not rule.hard:
+                    self._soft_daily_limits.append(rule)
+                    continue
+                if rule.max_minutes is not None:
+                    self._max_day_minutes = min(self._max_day_minutes or rule.max_minutes, rule.max_minutes)
+                if rule.max_tasks is not None:
+                    self._max_day_tasks = min(self._max_day_tasks or rule.max_tasks, rule.max_tasks)
+                continue
+            if not isinstance(rule, DayWindow):
+                continue
+            if rule.min_start is not None:
+                min_start = max(min_start, rule.min_start)
+            if rule.max_end is not None:
+                max_end = min(max_end, rule.max_end)
+            disallowed.update(rule.disallowed_days)
+        
+        self._day_windows = [
+            None if self.day_weekdays[index] in disallowed or day.lower() in disallowed
+            else (min_start, max_end)
+            for index, day in enumerate(self.days)
+        ]
+        self._hard_daily_limits = self._max_day_minutes is not None or self._max_day_tasks is not None
+        self._global_mask_cache = {}
+    
+    def _day_has_room(self, day_index, duration, day_minutes=None, day_counts=None):
+        """Hard daily limits: can one more item of this duration go on the day? O(1)"""
+        day_minutes = self._day_minutes if day_minutes is None else day_minutes
+        day_counts = self._day_counts if day_counts is None else day_counts
+        if self._max_day_tasks is not None and day_counts[day_index] >= self._max_day_tasks:
+            return False
+        if self._max_day_minutes is not None and day_minutes[day_index] + duration > self._max_day_minutes:
+            return False
         return True
     
+    def _day_penalties(self, duration):
+        """Per-day score penalty for the soft daily limits a placement would exceed"""
+        minutes = np.asarray(self._day_minutes)
+        counts = np.asarray(self._day_counts)
+        penalties = np.zeros(len(self.days))
+        for rule in self._soft_daily_limits:
+            over = np.zeros(len(self.days), dtype=bool)
+            if rule.max_minutes is not None:
+                over |= minutes + duration > rule.max_minutes
+            if rule.max_tasks is not None:
+                over |= counts >= rule.max_tasks
+            penalties += _SOFT_LIMIT_WEIGHT * (rule.priority or 1) * over
+        return penalties
+    
+    def _global_masks_for(self, duration):
+        """Per-day bitmask of slot starts allowed by global constraints for a duration"""
+        masks = self._global_mask_cache.get(duration)
+        if masks is None:
+            masks = [
+                0 if window is None
+                else self._range_mask(window[0], min(window[1], self.slot_end) - duration + 1)
+                for window in self._day_windows
+            ]
+            self._global_mask_cache[duration] = masks
+        return masks
+    
+    def _check_global_constraints(self, day, start_time, end_time):
+        """Check if placement violates global constraints"""
+        window = self._day_windows[self._day_index[day]]
+        if window is None:
+            return False
+        return window[0] <= start_time and end_time <= window[1]
+    
+    def _compile_task_masks(self, task):
+        """Compile a task's constraints into a per-day bitmask of allowed slot starts"""
+        masks = [self.full_mask] * len(self.days)
+        for _, allowed in self._task_constraint_masks(task):
+            masks = [mask & day_allowed for mask, day_allowed in zip(masks, allowed)]
+        return masks
+    
+    def _task_constraint_masks(self, task):
+        """(constraint type, per-day allowed-start masks) for each task constraint"""
+        return [(constraint.type, constraint.masks(self, task)) for constraint in task["constraints"]]
+    
     def _check_task_constraints(self, task, day, start_time, end_time):
         """Check if placement violates task-specific constraints"""
-        constraints = task.get("constraints", [])
-        
-        for constraint in constraints:
-            ctype = constraint["type"]
-            value = constraint["value"]
-            
-            # Must morning
-            if ctype == "must_morning":
-                hour = int(start_time.split(":")[0])
-                if hour >= 12:
-                    return False
-            
-            # Must afternoon
-            if ctype == "must_afternoon":
-                hour = int(start_time.split(":")[0])
-                if hour < 12 or hour >= 18:
-                    return False
-            
-            # Must evening
-            if ctype == "must_evening":
-                hour = int(start_time.split(":")[0])
-                if hour < 18:
-                    return False
-            
-            # Fixed day
-            if ctype == "fixed_day":
-                if day.lower() != value.get("day", "").lower():
-                    return False
-            
-            # Fixed time
-            if ctype == "fixed_time":
-                if start_time != value.get("start") or end_time != value.get("end"):
-                    return False
-        
-        return True
+        day_index = self._day_index[day]
+        return all(
+            constraint.allows(self, day_index, start_time, end_time)
+            for constraint in task["constraints"]
+        )
     
     def _has_overlap(self, day, start_time, end_time):
         """Check if time slot overlaps with existing tasks"""
-        for scheduled in self.schedule[day]:
-            scheduled_start = scheduled["start"]
-            scheduled_end = scheduled["end"]
-            
-            # Check overlap
-            if not (end_time <= scheduled_start or start_time >= scheduled_end):
-                return True
-        
-        return False
-    
-    def _is_day_disallowed(self, day):
-        """Check if day is globally disallowed"""
-        for constraint in self.global_constraints:
-            if constraint["type"] == "disallowed_days":
-                if day.lower() in [d.lower() for d in constraint["value"]]:
-                    return True
-        return False
-    
-    def _add_minutes(self, time_str, minutes):
-        """Add minutes to a time string"""
-        time_obj = datetime.strptime(time_str, "%H:%M")
-        new_time = time_obj + timedelta(minutes=minutes)
-        return new_time.strftime("%H:%M")
\ No newline at end of file
+        self.profile.count("overlap_checks")
+        return not self.occupancy[day].fits(start_time, end_time)
+    
+    def _free_mask(self, day, duration):
+        """Bitmask of slot starts where a task of this duration fits between busy intervals"""
+        self.profile.count("overlap_checks")
+        mask = 0
+        for gap_start, gap_end in self.occupancy[day].free_gaps(duration):
+            mask |= self._range_mask(gap_start, gap_end - duration + 1)
+        return mask
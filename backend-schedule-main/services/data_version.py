@@ -0,0 +1,76 @@
+"""
+Per-user data version (users.data_version).
+
+Every write to a user's tasks, constraints or schedules calls touch()
+before committing: the counter is incremented in the same transaction as
+the change, so it moves exactly when the data does, in every process.
+GET routes turn it into an ETag (routes/conditional.py) and answer
+If-None-Match with 304 after a single primary-key lookup.
+
+Once the transaction commits, the touched users are also bumped in this
+process's read_cache. Reading a version with for_user()/for_task() feeds
+it to read_cache.observe(), so a write committed by another process
+invalidates the local cache on the next conditional GET instead of after
+the cache TTL.
+"""
+from sqlalchemy import event
+
+from core.database import SessionLocal
+from models.task_model import Task
+from models.user_model import User
+from services.read_cache import read_cache
+
+_TOUCHED = "touched_user_ids"
+
+
+def touch(session, *user_ids):
+    """Increment the data version of user_ids as part of session's transaction"""
+    user_ids = {user_id for user_id in user_ids if user_id is not None}
+    if not user_ids:
+        return
+
+    session.query(User)\
+        .filter(User.id.in_(user_ids))\
+        .update({User.data_version: User.data_version + 1}, synchronize_session=False)
+    session.info.setdefault(_TOUCHED, set()).update(user_ids)
+
+
+def for_user(user_id):
+    """(user_id, data_version), or None if the user doesn't exist"""
+    session = SessionLocal()
+    try:
+        version = session.query(User.data_version).filter(User.id == user_id).scalar()
+    finally:
+        session.close()
+
+    if version is None:
+        return None
+    read_cache.observe(user_id, version)
+    return user_id, version
+
+
+def for_task(task_id):
+    """(owner user_id, data_version) of a task, or None if the task doesn't exist"""
+    session = SessionLocal()
+    try:
+        row = session.query(User.id, User.data_version)\
+            .join(Task, Task.user_id == User.id)\
+            .filter(Task.id == task_id).first()
+    finally:
+        session.close()
+
+    if row is None:
+        return None
+    read_cache.observe(row.id, row.data_version)
+    return row.id, row.data_version
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _bump_read_cache(session):
+    for user_id in session.info.pop(_TOUCHED, ()):
+        read_cache.bump(user_id)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _forget_touched(session):
+    session.info.pop(_TOUCHED, None)
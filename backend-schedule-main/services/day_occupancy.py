@@ -0,0 +1,79 @@
+from bisect import bisect_left, bisect_right
+
+from services.solver_time import MINUTES_PER_DAY
+
+
+class DayOccupancy:
+    """
+    Busy intervals of a single day, in minutes since midnight.
+
+    Intervals are half-open [start, end) and never overlap, so both the
+    start and end lists stay sorted and every lookup is a bisect.
+    """
+
+    def __init__(self, day_start=0, day_end=MINUTES_PER_DAY):
+        self.day_start = day_start
+        self.day_end = day_end
+        self.starts = []
+        self.ends = []
+
+    def __len__(self):
+        return len(self.starts)
+
+    def copy(self):
+        clone = DayOccupancy(self.day_start, self.day_end)
+        clone.starts = list(self.starts)
+        clone.ends = list(self.ends)
+        return clone
+
+    def fits(self, start, end):
+        """Check whether [start, end) is free"""
+        i = bisect_right(self.starts, start)
+
+        # Previous interval must end before we start
+        if i > 0 and self.ends[i - 1] > start:
+            return False
+
+        # Next interval must start after we end
+        if i < len(self.starts) and self.starts[i] < end:
+            return False
+
+        return True
+
+    def add(self, start, end):
+        """Mark [start, end) as busy (caller checks fits() first)"""
+        i = bisect_right(self.starts, start)
+        self.starts.insert(i, start)
+        self.ends.insert(i, end)
+
+    def remove(self, start, end):
+        """Free a previously added interval"""
+        i = bisect_left(self.starts, start)
+        if i < len(self.starts) and self.starts[i] == start and self.ends[i] == end:
+            del self.starts[i]
+            del self.ends[i]
+            return True
+        return False
+
+    def free_gaps(self, min_length=1, lo=None, hi=None):
+        """Yield free (gap_start, gap_end) pairs of at least min_length inside [lo, hi)"""
+        lo = self.day_start if lo is None else max(lo, self.day_start)
+        hi = self.day_end if hi is None else min(hi, self.day_end)
+
+        # First interval that ends after lo
+        i = bisect_right(self.ends, lo)
+        cursor = lo
+
+        while cursor < hi:
+            if i < len(self.starts):
+                gap_end = min(self.starts[i], hi)
+                next_cursor = self.ends[i]
+            else:
+                gap_end = hi
+                next_cursor = hi
+
+            if gap_end - cursor >= min_length:
+                yield cursor, gap_end
+
+            cursor = max(cursor, next_cursor)
+            i += 1
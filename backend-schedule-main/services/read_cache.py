@@ -0,0 +1,124 @@
+"""
+Per-user read-through cache for the dashboard getters.
+
+Getters decorated with @cached_read (schedule, task and global-constraint
+reads whose first argument is a user id) are served from an in-process
+LRU. Every entry key carries the user's current version number; the
+write paths of ScheduleService, TaskService and ConstraintService bump it
+once they commit (data_version.touch()), so all of that user's cached
+reads miss from then on and old entries simply age out. Writes made by
+another worker process are picked up through observe() when a GET route
+checks users.data_version, and otherwise within the per-entry TTL.
+
+Cached values are shared between callers and must be treated as
+read-only.
+"""
+import functools
+import threading
+import time
+from collections import OrderedDict
+
+from config import Config
+
+
+class ReadCache:
+
+    def __init__(self, max_entries=2048, ttl_seconds=30.0, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._observed = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get_or_load(self, user_id, key, loader):
+        """Cached value of key for the user, or loader() (stored for next time)"""
+        now = self._clock()
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+            full_key = (user_id, version, key)
+            entry = self._entries.get(full_key)
+            if entry is not None:
+                expires_at, value = entry
+                if expires_at > now:
+                    self._entries.move_to_end(full_key)
+                    self.hits += 1
+                    return value
+                del self._entries[full_key]
+                self.expired += 1
+            self.misses += 1
+
+        value = loader()
+
+        with self._lock:
+            # A write that landed while loading may not be in value: don't keep it
+            if self._versions.get(user_id, 0) == version:
+                self._entries[full_key] = (self._clock() + self.ttl_seconds, value)
+                self._entries.move_to_end(full_key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.evictions += 1
+        return value
+
+    def bump(self, user_id):
+        """Invalidate every cached read of a user (call after committing a write)"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def observe(self, user_id, data_version):
+        """Invalidate the user's reads if their stored data version changed since last seen"""
+        with self._lock:
+            previous = self._observed.get(user_id)
+            if previous == data_version:
+                return
+            self._observed[user_id] = data_version
+            if previous is None:
+                # First sight only sets the baseline: a restart keeps valid entries
+                return
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+            self.invalidations += 1
+
+    def version(self, user_id):
+        with self._lock:
+            return self._versions.get(user_id, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
+
+
+read_cache = ReadCache(Config.READ_CACHE_SIZE, Config.READ_CACHE_TTL_SECONDS)
+
+
+def cached_read(func):
+    """Serve func(user_id, *args) through read_cache, keyed by name and arguments"""
+    name = func.__qualname__
+
+    @functools.wraps(func)
+    def wrapper(user_id, *args, **kwargs):
+        key = (name, args, tuple(sorted(kwargs.items())))
+        return read_cache.get_or_load(user_id, key, lambda: func(user_id, *args, **kwargs))
+
+    return wrapper
@@ -0,0 +1,260 @@
+"""
+Background schedule generation.
+
+submit() records a ScheduleJob row and hands it to a small in-process
+thread pool (Config.SCHEDULE_JOB_WORKERS), so POST /generate-style
+requests return at once with a job id instead of holding a request
+thread for the whole solve. Job state lives in the schedule_jobs table;
+clients poll get_job() for status, progress and, once done, the result.
+
+A user has at most one job in flight: a partial unique index on
+schedule_jobs(user_id) WHERE status is queued/running enforces it across
+processes, and submitting again returns the job already in flight. A
+worker claims a job by flipping it queued -> running in one conditional
+UPDATE, so a job handed to more than one pool still runs once. While it
+runs, a heartbeat thread refreshes heartbeat_at every
+Config.SCHEDULE_JOB_HEARTBEAT_SECONDS, however long the solve takes; a
+running job whose heartbeat is older than Config.SCHEDULE_JOB_STALE_SECONDS
+belongs to a dead worker and is marked failed. recover_jobs() (called at app start) does that for every
+user and re-queues the jobs that were still waiting in a dead process's
+pool.
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from sqlalchemy.exc import IntegrityError
+
+from config import Config
+from core.database import SessionLocal
+from models.schedule_job_model import ScheduleJob
+from services.schedule_service import ScheduleService
+
+logger = logging.getLogger(__name__)
+
+IN_FLIGHT = ("queued", "running")
+
+_executor = ThreadPoolExecutor(
+    max_workers=Config.SCHEDULE_JOB_WORKERS, thread_name_prefix="schedule-job"
+)
+
+
+class ScheduleJobService:
+
+    @staticmethod
+    def submit(user_id, engine=None, time_budget_ms=None):
+        """Queue a generate job for a user, or join the one already in flight"""
+        session = SessionLocal()
+        try:
+            ScheduleJobService._expire_stale(session, user_id)
+
+            job = ScheduleJobService._in_flight(session, user_id)
+            if job:
+                return dict(ScheduleJobService._to_dict(job), deduplicated=True)
+
+            job = ScheduleJob(
+                user_id=user_id,
+                status="queued",
+                progress=0,
+                options={"engine": engine, "time_budget_ms": time_budget_ms},
+            )
+            session.add(job)
+            try:
+                session.commit()
+            except IntegrityError:
+                # Another request (maybe another process) queued one first
+                session.rollback()
+                job = ScheduleJobService._in_flight(session, user_id)
+                if job is None:
+                    raise
+                return dict(ScheduleJobService._to_dict(job), deduplicated=True)
+            session.refresh(job)
+
+            _executor.submit(ScheduleJobService._run, job.id)
+            return dict(ScheduleJobService._to_dict(job), deduplicated=False)
+
+        finally:
+            session.close()
+
+    @staticmethod
+    def get_job(job_id):
+        session = SessionLocal()
+        try:
+            job = session.query(ScheduleJob).get(job_id)
+            if not job:
+                return None
+            return ScheduleJobService._to_dict(job, with_result=True)
+        finally:
+            session.close()
+
+    @staticmethod
+    def get_user_jobs(user_id, limit=10):
+        session = SessionLocal()
+        try:
+            jobs = session.query(ScheduleJob)\
+                .filter(ScheduleJob.user_id == user_id)\
+                .order_by(ScheduleJob.id.desc()).limit(limit).all()
+
+            return [ScheduleJobService._to_dict(j) for j in jobs]
+        finally:
+            session.close()
+
+    @staticmethod
+    def recover_jobs():
+        """
+        Startup hook: fail running jobs whose worker is gone and re-queue
+        the queued ones here (the claim keeps a job from running twice if
+        another live process also has it). Never raises.
+        """
+        session = SessionLocal()
+        try:
+            ScheduleJobService._expire_stale(session)
+            queued = [
+                row.id for row in session.query(ScheduleJob.id)
+                    .filter(ScheduleJob.status == "queued")
+                    .order_by(ScheduleJob.id)
+            ]
+        except Exception:
+            logger.exception("Could not recover schedule jobs")
+            return 0
+        finally:
+            session.close()
+
+        for job_id in queued:
+            _executor.submit(ScheduleJobService._run, job_id)
+        return len(queued)
+
+    # ==========================================================
+    # WORKER
+    # ==========================================================
+    @staticmethod
+    def _run(job_id):
+        """Pool entry point: run one job and record how it ended, never raise"""
+        try:
+            job = ScheduleJobService._claim(job_id)
+            if job is None:
+                # Already claimed elsewhere, finished, or expired meanwhile
+                return
+            options = job["options"] or {}
+
+            stop = threading.Event()
+            heartbeat = threading.Thread(
+                target=ScheduleJobService._heartbeat, args=(job_id, stop),
+                name=f"schedule-job-{job_id}-heartbeat", daemon=True
+            )
+            heartbeat.start()
+            try:
+                result = ScheduleService.generate_weekly_schedule(
+                    job["user_id"],
+                    time_budget_ms=options.get("time_budget_ms"),
+                    engine=options.get("engine"),
+                    progress=lambda percent: ScheduleJobService._update_running(job_id, progress=percent),
+                )
+            finally:
+                stop.set()
+                heartbeat.join()
+            ScheduleJobService._update_running(
+                job_id, status="succeeded", progress=100, result=result, finished_at=datetime.utcnow()
+            )
+        except Exception as e:
+            logger.exception("Schedule job %s failed", job_id)
+            try:
+                ScheduleJobService._update_running(
+                    job_id, status="failed", error=f"{type(e).__name__}: {e}", finished_at=datetime.utcnow()
+                )
+            except Exception:
+                logger.exception("Could not record failure of schedule job %s", job_id)
+
+    @staticmethod
+    def _heartbeat(job_id, stop):
+        """Keep a running job's heartbeat fresh until stop is set (the solve may not report for minutes)"""
+        while not stop.wait(Config.SCHEDULE_JOB_HEARTBEAT_SECONDS):
+            try:
+                ScheduleJobService._update_running(job_id)
+            except Exception:
+                # A missed beat is harmless: the stale threshold is many beats long
+                logger.exception("Could not refresh heartbeat of schedule job %s", job_id)
+
+    @staticmethod
+    def _claim(job_id):
+        """queued -> running in one conditional UPDATE; the job dict, or None if not ours"""
+        session = SessionLocal()
+        try:
+            now = datetime.utcnow()
+            claimed = session.query(ScheduleJob).filter(
+                ScheduleJob.id == job_id,
+                ScheduleJob.status == "queued"
+            ).update({
+                "status": "running",
+                "progress": 5,
+                "started_at": now,
+                "heartbeat_at": now,
+            }, synchronize_session=False)
+            session.commit()
+            if not claimed:
+                return None
+            return ScheduleJobService._to_dict(session.query(ScheduleJob).get(job_id))
+        finally:
+            session.close()
+
+    @staticmethod
+    def _update_running(job_id, **fields):
+        """Update a job this worker is running (no-op once it was expired); refreshes the heartbeat"""
+        session = SessionLocal()
+        try:
+            fields["heartbeat_at"] = datetime.utcnow()
+            session.query(ScheduleJob).filter(
+                ScheduleJob.id == job_id,
+                ScheduleJob.status == "running"
+            ).update(fields, synchronize_session=False)
+            session.commit()
+        finally:
+            session.close()
+
+    @staticmethod
+    def _in_flight(session, user_id):
+        return session.query(ScheduleJob).filter(
+            ScheduleJob.user_id == user_id,
+            ScheduleJob.status.in_(IN_FLIGHT)
+        ).order_by(ScheduleJob.id.desc()).first()
+
+    @staticmethod
+    def _expire_stale(session, user_id=None):
+        """Fail running jobs whose worker stopped sending heartbeats (all users if user_id is None)"""
+        cutoff = datetime.utcnow() - timedelta(seconds=Config.SCHEDULE_JOB_STALE_SECONDS)
+        query = session.query(ScheduleJob).filter(
+            ScheduleJob.status == "running",
+            ScheduleJob.heartbeat_at < cutoff
+        )
+        if user_id is not None:
+            query = query.filter(ScheduleJob.user_id == user_id)
+
+        expired = query.update({
+            "status": "failed",
+            "error": "Worker stopped responding (process restarted?)",
+            "finished_at": datetime.utcnow(),
+        }, synchronize_session=False)
+        if expired:
+            session.commit()
+
+    @staticmethod
+    def _to_dict(job, with_result=False):
+        data = {
+            "id": job.id,
+            "user_id": job.user_id,
+            "status": job.status,
+            "progress": job.progress,
+            "options": job.options,
+            "error": job.error,
+            "created_at": ScheduleJobService._fmt(job.created_at),
+            "started_at": ScheduleJobService._fmt(job.started_at),
+            "finished_at": ScheduleJobService._fmt(job.finished_at),
+        }
+        if with_result:
+            data["result"] = job.result
+        return data
+
+    @staticmethod
+    def _fmt(value):
+        return value.strftime("%Y-%m-%d %H:%M:%S") if value else None
@@ -1,18 +1,290 @@
-from datetime import datetime, timedelta
+import logging
+from datetime import date, datetime, timedelta
 from sqlalchemy import and_
-from core.database import db
+from config import Config
+from core.database import SessionLocal
 
+from models.constraint_global_model import GlobalConstraint
+from models.constraint_task_model import TaskConstraint
 from models.schedule_model import Schedule
 from models.task_model import Task
 from models.user_model import User
+from services.csp_solver_v2 import SOLVER_VERSION, CSPScheduler
+from services import data_version
+from services.read_cache import cached_read, read_cache
+from services.solver_cache import SolverCache
+from services.solver_engine import get_engine, normalize_input
+from services.solver_time import MINUTES_PER_DAY, to_label, to_minutes
+from services.schedule_writer import write_schedules
+
+logger = logging.getLogger(__name__)
+
+solver_cache = SolverCache(Config.SOLVER_CACHE_SIZE, Config.SOLVER_CACHE_DIR, Config.SOLVER_CACHE_DISK_SIZE)
 
 
 class ScheduleService:
 
+    # ==========================================================
+    # GENERATE WEEKLY SCHEDULE
+    # ==========================================================
+    @staticmethod
+    def generate_weekly_schedule(user_id, time_budget_ms=None, engine=None, profile=False, progress=None):
+        """
+        Jalankan solver untuk semua task user lalu simpan hasilnya.
+        engine memilih strategi (lihat solver_engine.available_engines());
+        default Config.SOLVER_ENGINE, atau "anytime" kalau time_budget_ms
+        diberikan: hasil greedy diperbaiki dengan local search sampai waktu habis.
+        profile=True selalu menjalankan solver (tanpa cache) dan menambahkan
+        blok "profile" ke hasil.
+        progress(percent) dipanggil setelah input dimuat dan setelah solve.
+        """
+        engine = engine or ("anytime" if time_budget_ms else Config.SOLVER_ENGINE)
+        # Satu waktu acuan per generate: dipakai solver dan kunci cache
+        now = datetime.now()
+        session = SessionLocal()
+        try:
+            tasks, global_constraints, invalid = ScheduleService._load_solver_input(session, user_id)
+            if progress:
+                progress(20)
+
+            # Input sama -> hasil sama; solver dilewati kalau ada di cache
+            cache_key = SolverCache.make_key({
+                "tasks": tasks,
+                "global_constraints": global_constraints,
+                "invalid": invalid,
+                "engine": engine,
+                "time_budget_ms": time_budget_ms,
+                "slot_minutes": Config.SOLVER_SLOT_MINUTES,
+                "horizon_weeks": Config.SOLVER_HORIZON_WEEKS,
+                "solver_version": SOLVER_VERSION,
+                "anchor_date": now.date().isoformat(),
+            })
+            # Entri disk dari versi solver / tanggal acuan lain tidak terpakai lagi
+            cache_namespace = f"{SOLVER_VERSION}_{now.date().isoformat()}"
+            cached = None if profile else solver_cache.get(cache_key, cache_namespace)
+
+            if cached is not None:
+                result = dict(cached, cached=True)
+            else:
+                result = ScheduleService._solve(
+                    tasks, global_constraints, invalid, engine, time_budget_ms, profile, now
+                )
+                solver_cache.put(
+                    cache_key, {k: v for k, v in result.items() if k != "profile"}, cache_namespace
+                )
+                result = dict(result, cached=False)
+            if progress:
+                progress(80)
+
+            result["writes"] = ScheduleService._save_solution(session, user_id, result["schedule"])
+            if ScheduleService._rows_written(result["writes"]):
+                # An unchanged week keeps the user's cached reads valid
+                data_version.touch(session, user_id)
+            session.commit()
+
+            return result
+
+        finally:
+            session.close()
+
+    @staticmethod
+    def _new_scheduler():
+        return CSPScheduler(
+            slot_minutes=Config.SOLVER_SLOT_MINUTES, horizon_weeks=Config.SOLVER_HORIZON_WEEKS
+        )
+
+    @staticmethod
+    def _solve(tasks, global_constraints, invalid, engine=None, time_budget_ms=None, profile=False, now=None):
+        tasks, global_constraints = normalize_input(tasks, global_constraints)
+        solver = get_engine(
+            engine or Config.SOLVER_ENGINE,
+            slot_minutes=Config.SOLVER_SLOT_MINUTES,
+            horizon_weeks=Config.SOLVER_HORIZON_WEEKS,
+            time_budget_ms=time_budget_ms,
+            profile=profile,
+            now=now,
+        )
+        result = solver.solve(tasks, global_constraints)
+        result["engine"] = solver.name
+
+        if invalid:
+            result["failed_tasks"].extend(invalid)
+            result["success"] = False
+            result["message"] = f"{len(result['failed_tasks'])} tasks could not be scheduled"
+
+        return result
+
+    @staticmethod
+    def cache_stats():
+        return solver_cache.stats()
+
+    @staticmethod
+    def read_cache_stats():
+        return read_cache.stats()
+
+    @staticmethod
+    def _load_solver_input(session, user_id):
+        """Load tasks (with their constraints) and global constraints in solver format"""
+        tasks = session.query(Task).filter(Task.user_id == user_id).all()
+        task_ids = [t.id for t in tasks]
+
+        constraints_by_task = {task_id: [] for task_id in task_ids}
+        if task_ids:
+            task_constraints = session.query(TaskConstraint)\
+                .filter(TaskConstraint.task_id.in_(task_ids)).all()
+            for c in task_constraints:
+                constraints_by_task[c.task_id].append(
+                    {"type": c.type, "value": c.value, "priority": c.priority}
+                )
+
+        global_constraints = [
+            {"type": c.type, "value": c.value, "priority": c.priority}
+            for c in session.query(GlobalConstraint)
+                .filter(GlobalConstraint.user_id == user_id).all()
+        ]
+
+        solver_tasks, invalid = ScheduleService._build_solver_tasks(tasks, constraints_by_task)
+        return solver_tasks, global_constraints, invalid
+
+    @staticmethod
+    def _build_solver_tasks(tasks, constraints_by_task):
+        """Convert Task rows (+ their constraint dicts) to solver input"""
+        solver_tasks = []
+        invalid = []
+        for t in tasks:
+            # Task tidak lengkap tidak bisa dijadwalkan
+            if t.mode == "duration" and not t.duration_minutes:
+                invalid.append(ScheduleService._invalid_task(t, "Flex task has no duration_minutes"))
+                continue
+            if t.mode == "fixed" and not (t.day and t.start_time and t.end_time):
+                invalid.append(ScheduleService._invalid_task(t, "Fixed task needs day, start_time and end_time"))
+                continue
+
+            item = {
+                "id": t.id,
+                "name": t.name,
+                "mode": t.mode,
+                "day": t.day,
+                "start_time": t.start_time.strftime("%H:%M") if t.start_time else None,
+                "end_time": t.end_time.strftime("%H:%M") if t.end_time else None,
+                "duration": t.duration_minutes,
+                "category": t.category,
+                "difficulty": t.difficulty or 3,
+                "priority": t.priority or 3,
+                "preferred_time": t.preferred_time or [],
+                "constraints": constraints_by_task.get(t.id, []),
+            }
+            if t.deadline_day:
+                item["deadline"] = {
+                    "date": t.deadline_day.strftime("%Y-%m-%d"),
+                    "time": t.deadline_time.strftime("%H:%M") if t.deadline_time else "23:59",
+                }
+            solver_tasks.append(item)
+
+        return solver_tasks, invalid
+
+    @staticmethod
+    def _invalid_task(task, reason):
+        return {
+            "task_id": task.id,
+            "name": task.name,
+            "status": "INVALID_TASK",
+            "reason": reason
+        }
+
+    @staticmethod
+    def _save_solution(session, user_id, schedule):
+        """Store the solver output, writing only rows that changed"""
+        writes = write_schedules(session, {user_id: schedule})
+        # Satu user saja: per_user tidak menambah informasi
+        del writes["per_user"]
+        return writes
+
+    @staticmethod
+    def _rows_written(writes):
+        return writes["inserted"] + writes["updated"] + writes["deleted"]
+
+    # ==========================================================
+    # INCREMENTAL REPAIR
+    # ==========================================================
+    @staticmethod
+    def repair_schedule(user_id, changed_task_ids=()):
+        """
+        Perbaiki jadwal yang sudah tersimpan setelah task/constraint berubah,
+        tanpa menghitung ulang seluruh minggu. Hanya baris milik task yang
+        berpindah yang ditulis ulang. Return None kalau user belum punya jadwal.
+        """
+        session = SessionLocal()
+        try:
+            rows = session.query(
+                Schedule.task_id, Schedule.day, Schedule.start_time, Schedule.end_time
+            ).filter(Schedule.user_id == user_id).all()
+            if not rows:
+                return None
+
+            tasks, global_constraints, _ = ScheduleService._load_solver_input(session, user_id)
+            tasks, global_constraints = normalize_input(tasks, global_constraints)
+            tasks_by_id = {t["id"]: t for t in tasks}
+            current = [
+                {
+                    "task_id": r.task_id,
+                    "day": r.day,
+                    "start": r.start_time.strftime("%H:%M"),
+                    "end": ScheduleService._stored_end(r, tasks_by_id.get(r.task_id)),
+                }
+                for r in rows
+            ]
+
+            result = ScheduleService._new_scheduler().repair(tasks, global_constraints, current, changed_task_ids)
+
+            if result["repair"]["moved_task_ids"] or result["repair"]["removed_task_ids"]:
+                result["writes"] = ScheduleService._save_solution(session, user_id, result["schedule"])
+                if ScheduleService._rows_written(result["writes"]):
+                    data_version.touch(session, user_id)
+                session.commit()
+
+            return result
+
+        finally:
+            session.close()
+
+    @staticmethod
+    def _stored_end(row, task):
+        """
+        End "HH:MM" of a stored row. Kolom Time tidak bisa menyimpan 24:00
+        (to_time menyimpannya sebagai 23:59); kalau task-nya memang berakhir
+        24:00 (fixed: end_time, flex: start + durasi), 23:59 dibaca lagi
+        sebagai 24:00 supaya task tidak dianggap pindah.
+        """
+        end = to_minutes(row.end_time)
+        if end == MINUTES_PER_DAY - 1 and task is not None:
+            if task["mode"] == "fixed":
+                expected = to_minutes(task["end_time"]) if task.get("end_time") else None
+            elif task.get("duration"):
+                expected = to_minutes(row.start_time) + task["duration"]
+            else:
+                expected = None
+            if expected == MINUTES_PER_DAY:
+                end = MINUTES_PER_DAY
+        return to_label(end)
+
+    @staticmethod
+    def repair_after_change(user_id, changed_task_ids=()):
+        """
+        Hook untuk TaskService/ConstraintService setelah commit.
+        Perubahan data sudah tersimpan, jadi kegagalan repair hanya dicatat.
+        """
+        try:
+            return ScheduleService.repair_schedule(user_id, changed_task_ids)
+        except Exception:
+            logger.exception("Schedule repair failed for user %s", user_id)
+            return None
+
     # ==========================================================
     # GET WEEKLY SCHEDULE (YANG DIMINTA)
     # ==========================================================
     @staticmethod
+    @cached_read
     def get_user_weekly_schedule(user_id):
         """
         Mengembalikan jadwal 1 minggu penuh, dikelompokkan per-hari.
@@ -23,6 +295,9 @@ class ScheduleService:
             ...
             "sunday": [...]
         }
+        Dengan Config.SOLVER_HORIZON_WEEKS > 1 jadwal flex disimpan per
+        tanggal; hari bertanggal ("2026-10-19": [...]) ikut setelah "sunday",
+        urut tanggal.
         """
 
         days_order = [
@@ -30,28 +305,27 @@ class ScheduleService:
             "friday", "saturday", "sunday"
         ]
 
-        # Ambil semua schedule user
-        schedules = Schedule.query.filter_by(user_id=user_id).order_by(
-            Schedule.day.asc(),
-            Schedule.start_time.asc()
-        ).all()
+        session = SessionLocal()
+        try:
+            rows = ScheduleService._schedule_view(session, user_id).all()
+        finally:
+            session.close()
 
         # Siapkan dict kosong per hari
         weekly = {day: [] for day in days_order}
 
         # Isi ke dalam list per hari
-        for s in schedules:
+        for r in rows:
             item = {
-                "id": s.id,
-                "task_id": s.task_id,
-                "task_name": s.task.name if s.task else None,
-                "start_time": s.start_time.strftime("%H:%M"),
-                "end_time": s.end_time.strftime("%H:%M")
+                "id": r.id,
+                "task_id": r.task_id,
+                "task_name": r.task_name,
+                "start_time": r.start_time.strftime("%H:%M"),
+                "end_time": r.end_time.strftime("%H:%M")
             }
-            day = s.day.lower()
+            day = r.day.lower()
 
-            if day in weekly:
-                weekly[day].append(item)
+            weekly.setdefault(day, []).append(item)
 
         return {"success": True, "weekly": weekly}
 
@@ -60,13 +334,11 @@ class ScheduleService:
     # ==========================================================
     @staticmethod
     def get_schedule_by_id(user_id):
+        session = SessionLocal()
         try:
-            schedules = Schedule.query.filter_by(user_id=user_id).order_by(
-                Schedule.day.asc(),
-                Schedule.start_time.asc()
-            ).all()
+            rows = ScheduleService._schedule_view(session, user_id).all()
 
-            if not schedules:
+            if not rows:
                 return {
                     "success": False,
                     "message": "No schedule found for this user."
@@ -74,104 +346,154 @@ class ScheduleService:
 
             result = [
                 {
-                    "id": s.id,
-                    "task_id": s.task_id,
-                    "task_name": s.task.name if s.task else None,
-                    "day": s.day,
-                    "start_time": s.start_time.strftime("%H:%M"),
-                    "end_time": s.end_time.strftime("%H:%M")
+                    "id": r.id,
+                    "task_id": r.task_id,
+                    "task_name": r.task_name,
+                    "day": r.day,
+                    "start_time": r.start_time.strftime("%H:%M"),
+                    "end_time": r.end_time.strftime("%H:%M")
                 }
-                for s in schedules
+                for r in rows
             ]
 
             return {"success": True, "schedule": result}
 
         except Exception as e:
             return {"success": False, "error": str(e)}
+        finally:
+            session.close()
 
     # ==========================================================
     # GET TODAY
     # ==========================================================
     @staticmethod
     def get_today_schedule(user_id):
-        today = datetime.now().strftime("%A").lower()
-
-        schedules = Schedule.query.filter_by(user_id=user_id, day=today).order_by(
-            Schedule.start_time.asc()
-        ).all()
-
-        return [
-            {
-                "id": s.id,
-                "task_name": s.task.name if s.task else None,
-                "start_time": s.start_time.strftime("%H:%M"),
-                "end_time": s.end_time.strftime("%H:%M")
-            }
-            for s in schedules
-        ]
+        return ScheduleService.get_day_schedule(user_id, date.today().isoformat())
 
     # ==========================================================
     # GET SPECIFIC DAY
     # ==========================================================
     @staticmethod
+    @cached_read
     def get_day_schedule(user_id, day):
-        schedules = Schedule.query.filter_by(user_id=user_id, day=day.lower()).order_by(
-            Schedule.start_time.asc()
-        ).all()
+        """
+        day: nama hari ("monday") atau tanggal ISO ("2026-10-19"). Tanggal
+        juga mengembalikan baris mingguan hari itu (mis. "monday").
+        """
+        session = SessionLocal()
+        try:
+            rows = ScheduleService._schedule_view(session, user_id, ScheduleService._day_values(day)).all()
+        finally:
+            session.close()
 
         return [
             {
-                "id": s.id,
-                "task_name": s.task.name if s.task else None,
-                "start_time": s.start_time.strftime("%H:%M"),
-                "end_time": s.end_time.strftime("%H:%M")
+                "id": r.id,
+                "task_name": r.task_name,
+                "start_time": r.start_time.strftime("%H:%M"),
+                "end_time": r.end_time.strftime("%H:%M")
             }
-            for s in schedules
+            for r in rows
         ]
 
+    @staticmethod
+    def _day_values(day):
+        """Nilai kolom day untuk satu hari: nama hari, atau tanggal ISO + nama harinya"""
+        day = day.lower()
+        try:
+            weekday = date.fromisoformat(day).strftime("%A").lower()
+        except ValueError:
+            return [day]
+        return [day, weekday]
+
+    @staticmethod
+    def _schedule_view(session, user_id, day=None):
+        """
+        Satu query join schedules + tasks, hanya kolom yang dibutuhkan
+        (tanpa objek ORM, tanpa lazy-load task per baris).
+        Urut per hari lalu jam mulai. day: satu nilai atau list nilai
+        (satu hari kalender), diurut jam mulai.
+        """
+        query = session.query(
+            Schedule.id,
+            Schedule.task_id,
+            Task.name.label("task_name"),
+            Schedule.day,
+            Schedule.start_time,
+            Schedule.end_time,
+        ).outerjoin(Task, Task.id == Schedule.task_id)\
+            .filter(Schedule.user_id == user_id)
+
+        if isinstance(day, list):
+            return query.filter(Schedule.day.in_(day))\
+                .order_by(Schedule.start_time.asc(), Schedule.id.asc())
+        if day is not None:
+            query = query.filter(Schedule.day == day)
+
+        return query.order_by(Schedule.day.asc(), Schedule.start_time.asc(), Schedule.id.asc())
+
     # ==========================================================
     # DELETE ALL USER SCHEDULES
     # ==========================================================
     @staticmethod
     def delete_user_schedules(user_id):
-        deleted = Schedule.query.filter_by(user_id=user_id).delete()
-        db.session.commit()
-        return deleted > 0
+        session = SessionLocal()
+        try:
+            deleted = session.query(Schedule)\
+                .filter(Schedule.user_id == user_id)\
+                .delete(synchronize_session=False)
+            if deleted:
+                data_version.touch(session, user_id)
+            session.commit()
+            return deleted > 0
+        finally:
+            session.close()
 
     # ==========================================================
     # DELETE ONE ITEM
     # ==========================================================
     @staticmethod
     def delete_schedule_item(schedule_id):
-        schedule = Schedule.query.get(schedule_id)
-        if not schedule:
-            return False
+        session = SessionLocal()
+        try:
+            schedule = session.query(Schedule).get(schedule_id)
+            if not schedule:
+                return False
 
-        db.session.delete(schedule)
-        db.session.commit()
-        return True
+            user_id = schedule.user_id
+            session.delete(schedule)
+            data_version.touch(session, user_id)
+            session.commit()
+            return True
+        finally:
+            session.close()
 
     # ==========================================================
     # CHECK CONFLICTS
     # ==========================================================
     @staticmethod
+    @cached_read
     def check_scheduling_conflicts(user_id):
-        schedules = Schedule.query.filter_by(user_id=user_id).all()
+        session = SessionLocal()
+        try:
+            # Sudah urut (day, start_time) dari query
+            rows = ScheduleService._schedule_view(session, user_id).all()
+        finally:
+            session.close()
 
         conflicts = []
-        schedules_sorted = sorted(schedules, key=lambda s: (s.day, s.start_time))
 
-        for i in range(len(schedules_sorted) - 1):
-            curr = schedules_sorted[i]
-            next_item = schedules_sorted[i + 1]
+        for i in range(len(rows) - 1):
+            curr = rows[i]
+            next_item = rows[i + 1]
 
             # terjadi overlap
             if curr.day == next_item.day and curr.end_time > next_item.start_time:
                 conflicts.append({
                     "day": curr.day,
                     "conflict_between": [
-                        curr.task.name if curr.task else curr.id,
-                        next_item.task.name if next_item.task else next_item.id
+                        curr.task_name if curr.task_name is not None else curr.id,
+                        next_item.task_name if next_item.task_name is not None else next_item.id
                     ]
                 })
 
@@ -0,0 +1,129 @@
+"""
+Diff-based persistence of solver output into the schedules table.
+
+write_schedules() compares the new schedule of each user with the rows
+already stored and writes only the difference, in bulk:
+
+- a row whose task, day and times are unchanged is left alone (it keeps
+  its id and costs no write);
+- a task that moved reuses one of its old rows through a bulk UPDATE by
+  primary key;
+- what is left over becomes one bulk INSERT and one bulk DELETE.
+
+A regeneration usually moves a handful of tasks, so this writes a few
+rows where delete-all-then-insert rewrote the whole week. The caller owns
+the transaction: nothing is committed here.
+"""
+from collections import defaultdict
+
+from sqlalchemy import insert, update
+
+from models.schedule_model import Schedule
+from services.solver_time import to_minutes, to_time
+
+
+def schedule_rows(user_id, schedule, task_ids=None):
+    """Row dicts for solver output (optionally only some tasks)"""
+    return [
+        {
+            "user_id": user_id,
+            "task_id": entry["task_id"],
+            "day": day.lower(),
+            "start_time": to_time(to_minutes(entry["start"])),
+            "end_time": to_time(to_minutes(entry["end"])),
+        }
+        for day, entries in schedule.items()
+        for entry in entries
+        if task_ids is None or entry["task_id"] in task_ids
+    ]
+
+
+def write_schedules(session, schedules):
+    """
+    Bring the stored rows of every user in schedules ({user_id: solver
+    schedule}) in line with it. Returns counts of inserted / updated /
+    deleted / unchanged rows, and per_user: {user_id: rows written} for
+    the users whose rows changed.
+    """
+    stats = {"inserted": 0, "updated": 0, "deleted": 0, "unchanged": 0, "per_user": {}}
+    if not schedules:
+        return stats
+
+    new_rows = [
+        row
+        for user_id, schedule in schedules.items()
+        for row in schedule_rows(user_id, schedule)
+    ]
+    existing = session.query(
+        Schedule.id, Schedule.user_id, Schedule.task_id,
+        Schedule.day, Schedule.start_time, Schedule.end_time
+    ).filter(Schedule.user_id.in_(list(schedules))).all()
+
+    inserts, updates, deletes = diff_rows(existing, new_rows)
+
+    if updates:
+        session.execute(update(Schedule), updates)
+    if inserts:
+        session.execute(insert(Schedule), inserts)
+    if deletes:
+        session.query(Schedule)\
+            .filter(Schedule.id.in_(deletes))\
+            .delete(synchronize_session=False)
+
+    stats["inserted"] = len(inserts)
+    stats["updated"] = len(updates)
+    stats["deleted"] = len(deletes)
+    stats["unchanged"] = len(new_rows) - len(inserts) - len(updates)
+
+    owners = {row.id: row.user_id for row in existing}
+    per_user = defaultdict(int)
+    for row in inserts:
+        per_user[row["user_id"]] += 1
+    for row in updates:
+        per_user[owners[row["id"]]] += 1
+    for row_id in deletes:
+        per_user[owners[row_id]] += 1
+    stats["per_user"] = dict(per_user)
+    return stats
+
+
+def diff_rows(existing, new_rows):
+    """
+    Match new row dicts against existing rows (objects with id, user_id,
+    task_id, day, start_time, end_time). Returns (inserts, updates,
+    deletes): row dicts to insert, {"id", "day", "start_time", "end_time"}
+    dicts to update, and ids to delete.
+    """
+    # Identical rows first, so an unmoved task never turns into an update
+    exact = defaultdict(list)
+    for row in existing:
+        exact[(row.user_id, row.task_id, row.day, row.start_time, row.end_time)].append(row.id)
+
+    moved = []
+    for row in new_rows:
+        ids = exact.get((row["user_id"], row["task_id"], row["day"], row["start_time"], row["end_time"]))
+        if ids:
+            ids.pop()
+        else:
+            moved.append(row)
+
+    # Leftover old rows are reused by the same task's moved rows
+    spare = defaultdict(list)
+    for (user_id, task_id, *_), ids in exact.items():
+        spare[(user_id, task_id)].extend(ids)
+
+    inserts, updates = [], []
+    for row in moved:
+        ids = spare.get((row["user_id"], row["task_id"]))
+        if ids:
+            updates.append({
+                "id": ids.pop(),
+                "day": row["day"],
+                "start_time": row["start_time"],
+                "end_time": row["end_time"],
+            })
+        else:
+            inserts.append(row)
+
+    deletes = sorted(row_id for ids in spare.values() for row_id in ids)
+    return inserts, updates, deletes
@@ -0,0 +1,131 @@
+"""
+Vectorized slot scoring for CSPScheduler.
+
+build_score_table() computes the same heuristic as
+CSPScheduler._calculate_slot_score for every (task, day, slot). The score
+splits into a per-slot part (preferred time, difficulty, late hours) and a
+per-day part (week position / deadline). The slot part only depends on a
+task's preferred times and difficulty class, so tasks sharing those share
+one row; the full (task, day, slot) matrix is never materialized. Memory
+is O(profiles * slots + tasks * days) instead of O(tasks * days * slots),
+which keeps fine granularities and multi-week horizons cheap.
+"""
+import numpy as np
+
+# Preferred-time buckets: (name, first hour, end hour, bonus)
+_PREFERRED_BUCKETS = [
+    ("morning", 6, 12, 20),
+    ("afternoon", 12, 18, 20),
+    ("evening", 18, 22, 20),
+    ("night", 22, 24, 10),
+]
+
+
+class ScoreTable:
+    """
+    Factored score tensor: score[t, d, s] = slot_profiles[profile_of[t], s] + day_part[t, d].
+
+    table[row] gives the (day, slot) matrix of one task and
+    table.item(row, d, s) a single score, like the dense tensor did.
+    """
+
+    def __init__(self, slot_profiles, profile_of, day_part):
+        self.slot_profiles = slot_profiles
+        self.profile_of = profile_of
+        self.day_part = day_part
+        self.shape = (len(profile_of), day_part.shape[1], slot_profiles.shape[1])
+
+    def __len__(self):
+        return self.shape[0]
+
+    def __getitem__(self, row):
+        return self.slot_profiles[self.profile_of[row]][None, :] + self.day_part[row][:, None]
+
+    def item(self, row, day_index, slot_index):
+        return self.slot_profiles.item(self.profile_of[row], slot_index) + self.day_part.item(row, day_index)
+
+
+def build_score_table(tasks, context, time_slots):
+    """Return a ScoreTable of shape (len(tasks), len(context.day_dates), len(time_slots))"""
+    hours = np.asarray(time_slots, dtype=np.int64) // 60
+
+    profiles = {}
+    representatives = []
+    profile_of = np.empty(len(tasks), dtype=np.int64)
+    for row, task in enumerate(tasks):
+        key = _profile_key(task)
+        index = profiles.get(key)
+        if index is None:
+            index = profiles[key] = len(representatives)
+            representatives.append(task)
+        profile_of[row] = index
+
+    slot_profiles = _slot_scores(representatives, hours)
+    day_part = _day_scores(tasks, context)
+    return ScoreTable(slot_profiles, profile_of, day_part)
+
+
+def masks_to_bool(masks, slot_count):
+    """Unpack per-day int bitmasks into a (len(masks), slot_count) bool array"""
+    width = (slot_count + 7) // 8
+    raw = b"".join(mask.to_bytes(width, "little") for mask in masks)
+    bits = np.unpackbits(np.frombuffer(raw, dtype=np.uint8), bitorder="little")
+    return bits.reshape(len(masks), width * 8)[:, :slot_count].astype(bool)
+
+
+def _profile_key(task):
+    """Everything the slot part of the score depends on"""
+    preferred = task.get("preferred_time") or []
+    difficulty = task.get("difficulty") or 3
+    return (
+        tuple(name in preferred for name, _, _, _ in _PREFERRED_BUCKETS),
+        difficulty >= 4,
+        difficulty <= 2,
+    )
+
+
+def _slot_scores(tasks, hours):
+    """Base score + preferred time + difficulty + late-hour penalty, shape (T, S)"""
+    scores = np.full((len(tasks), len(hours)), 100.0)
+
+    for name, first, end, bonus in _PREFERRED_BUCKETS:
+        wants = np.array([name in (t.get("preferred_time") or []) for t in tasks], dtype=bool)
+        in_bucket = (hours >= first) & (hours < end)
+        scores += bonus * (wants[:, None] & in_bucket[None, :])
+
+    # Difficulty-time matching (hard tasks better in morning)
+    difficulty = np.array([t.get("difficulty") or 3 for t in tasks], dtype=np.int64)
+    scores += 15 * ((difficulty >= 4)[:, None] & (hours < 12)[None, :])
+    scores += 10 * ((difficulty <= 2)[:, None] & (hours >= 18)[None, :])
+
+    # Avoid very late hours
+    scores -= 20 * (hours >= 22)[None, :]
+
+    return scores
+
+
+def _day_scores(tasks, context):
+    """Week-position bonus or deadline proximity, shape (T, D)"""
+    day_count = len(context.day_dates)
+    day_ordinals = np.array(context.day_ordinals)
+
+    has_deadline = np.array(["deadline" in t for t in tasks], dtype=bool)
+    deadlines = np.array([_deadline_ordinal(context, t) for t in tasks], dtype=float)
+
+    # Unparseable deadlines are NaN, which fails every comparison -> 0
+    days_before = deadlines[:, None] - day_ordinals[None, :]
+    deadline_part = np.select(
+        [days_before < 0, days_before == 0, days_before <= 2],
+        [-100.0, 50.0, 30.0],
+        default=0.0,
+    )
+
+    # Prefer earlier in the week if no deadline
+    week_part = (6 - np.arange(day_count)) * 5.0
+
+    return np.where(has_deadline[:, None], deadline_part, week_part[None, :])
+
+
+def _deadline_ordinal(context, task):
+    deadline = context.deadline(task)
+    return np.nan if deadline is None else deadline.ordinal
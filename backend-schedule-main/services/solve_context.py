@@ -0,0 +1,67 @@
+"""
+Date context for one solve.
+
+CSPScheduler builds a SolveContext when a solve starts: a fixed reference
+"now", the calendar date of every schedule day, and each task's deadline
+parsed once into a Deadline (date, ordinal, minute). Ordering
+and scoring read from it instead of calling date.today() / strptime per
+candidate, so nothing depends on the wall clock partway through a solve
+and the same input with the same "now" always gives the same schedule.
+"""
+from datetime import datetime
+
+from services.solver_time import MINUTES_PER_DAY, to_minutes
+
+
+class Deadline:
+    """A parsed task deadline; compare ordinal with SolveContext.day_ordinals"""
+
+    __slots__ = ("date", "ordinal", "minute")
+
+    def __init__(self, deadline_date, minute):
+        self.date = deadline_date
+        self.ordinal = deadline_date.toordinal()
+        self.minute = minute
+
+
+class SolveContext:
+
+    def __init__(self, now, day_dates):
+        self.now = now
+        self.today = now.date()
+        self.day_dates = list(day_dates)
+        # Same order as day_dates, which need not be chronological (a
+        # one-week horizon lists Monday..Saturday by their next occurrence)
+        self.day_ordinals = [d.toordinal() for d in self.day_dates]
+        self._deadlines = {}
+
+    def days_until(self, deadline):
+        """Whole days from the reference date to a Deadline"""
+        return deadline.ordinal - self.today.toordinal()
+
+    def deadline(self, task):
+        """Parsed deadline of a task, None if it has none or it can't be parsed"""
+        key = task.get("id")
+        if key in self._deadlines:
+            return self._deadlines[key]
+
+        deadline = self._parse_deadline(task.get("deadline"))
+        if key is not None:
+            self._deadlines[key] = deadline
+        return deadline
+
+    def _parse_deadline(self, value):
+        if not isinstance(value, dict):
+            return None
+        try:
+            deadline_date = datetime.strptime(value["date"], "%Y-%m-%d").date()
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        # The time part only refines the deadline; a bad one means end of day
+        try:
+            minute = to_minutes(value["time"]) if value.get("time") else MINUTES_PER_DAY
+        except (TypeError, ValueError, IndexError):
+            minute = MINUTES_PER_DAY
+
+        return Deadline(deadline_date, minute)
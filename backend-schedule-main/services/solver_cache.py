@@ -0,0 +1,198 @@
+"""
+Content-addressed cache for solver results.
+
+The key is a sha256 of the canonical JSON of everything the solver result
+depends on: normalized tasks (with their constraints), global constraints,
+solve mode/budget, the solver version and the anchor date used for
+deadline scoring. Identical input -> identical key, so a user pressing
+"generate" again without changing anything skips the solve.
+
+Entries live in an in-process LRU (OrderedDict). With disk_dir set, they
+are also written there as solver-cache-<namespace>/<key>.json and read
+back on an in-memory miss, so the cache survives restarts and is shared
+between worker processes. The namespace names what makes every older
+entry useless at once (solver version + anchor date): writing into a new
+one deletes the others. Pruning only ever touches solver-cache-*
+directories and the .json / .tmp files in them, so disk_dir may be a
+shared directory. Every PRUNE_EVERY writes the namespace is cut back to
+disk_max_entries files, least recently used (file mtime; a disk hit
+touches it) going first.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+# Disk writes between two prunes of the current namespace
+PRUNE_EVERY = 64
+
+# Namespace directories are <disk_dir>/<NAMESPACE_PREFIX><namespace>
+NAMESPACE_PREFIX = "solver-cache-"
+
+
+class SolverCache:
+
+    def __init__(self, max_entries=256, disk_dir=None, disk_max_entries=4096):
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_entries = disk_max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.disk_pruned = 0
+        self._pruned_namespace = None
+        self._writes_since_prune = 0
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    @staticmethod
+    def make_key(payload):
+        """sha256 of payload serialized as canonical JSON"""
+        raw = json.dumps(payload, sort_keys=True, separators=(",", ":"), default=str)
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def get(self, key, namespace=""):
+        """Cached result for key, or None"""
+        with self._lock:
+            result = self._entries.get(key)
+            if result is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return result
+
+        result = self._read_disk(namespace, key)
+        with self._lock:
+            if result is None:
+                self.misses += 1
+                return None
+            self.disk_hits += 1
+            self._store(key, result)
+        return result
+
+    def put(self, key, result, namespace=""):
+        with self._lock:
+            self._store(key, result)
+        self._write_disk(namespace, key, result)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.disk_hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "disk_pruned": self.disk_pruned,
+                "hit_rate": round((self.hits + self.disk_hits) / lookups, 4) if lookups else 0.0,
+            }
+
+    def _store(self, key, result):
+        self._entries[key] = result
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def _namespace_dir(self, namespace):
+        return os.path.join(self.disk_dir, NAMESPACE_PREFIX + (namespace or "default"))
+
+    def _read_disk(self, namespace, key):
+        if not self.disk_dir:
+            return None
+        path = os.path.join(self._namespace_dir(namespace), key + ".json")
+        try:
+            with open(path, encoding="utf-8") as f:
+                result = json.load(f)
+            # Recently used: keep it past the next prune
+            os.utime(path)
+            return result
+        except (OSError, ValueError):
+            return None
+
+    def _write_disk(self, namespace, key, result):
+        if not self.disk_dir:
+            return
+        directory = self._namespace_dir(namespace)
+        # Write then rename so readers never see a partial file
+        path = os.path.join(directory, key + ".json")
+        tmp = f"{path}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(directory, exist_ok=True)
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp, path)
+        except OSError:
+            return
+
+        with self._lock:
+            self._writes_since_prune += 1
+            due = namespace != self._pruned_namespace or self._writes_since_prune >= PRUNE_EVERY
+            if due:
+                self._pruned_namespace = namespace
+                self._writes_since_prune = 0
+        if due:
+            self._prune_disk(directory)
+
+    def _prune_disk(self, current):
+        """Empty every other namespace directory, then drop the LRU excess of current"""
+        # Other processes prune too: anything may vanish under us, so skip what does
+        removed = 0
+        try:
+            for entry in os.scandir(self.disk_dir):
+                if (entry.path != current and entry.name.startswith(NAMESPACE_PREFIX)
+                        and entry.is_dir(follow_symlinks=False)):
+                    removed += len(_remove_all(_cache_files(entry.path)))
+                    # Only goes if nothing but cache files was in it
+                    _remove_dir(entry.path)
+        except OSError:
+            pass
+
+        files = []
+        for path in _cache_files(current, suffixes=(".json",)):
+            try:
+                files.append((os.stat(path).st_mtime, path))
+            except OSError:
+                continue
+        files.sort()
+        removed += len(_remove_all(path for _, path in files[:max(0, len(files) - self.disk_max_entries)]))
+
+        with self._lock:
+            self.disk_pruned += removed
+
+
+def _cache_files(directory, suffixes=(".json", ".tmp")):
+    """Paths of the files this cache writes in a namespace directory"""
+    try:
+        return [
+            entry.path for entry in os.scandir(directory)
+            if entry.name.endswith(suffixes) and entry.is_file(follow_symlinks=False)
+        ]
+    except OSError:
+        return []
+
+
+def _remove_all(paths):
+    return [path for path in paths if _remove(path)]
+
+
+def _remove_dir(path):
+    try:
+        os.rmdir(path)
+    except OSError:
+        pass
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+        return True
+    except OSError:
+        return False
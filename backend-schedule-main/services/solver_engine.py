@@ -0,0 +1,413 @@
+"""
+Pluggable solver engines.
+
+Every engine takes the same normalized input and returns the same result
+shape ({"success", "schedule", "failed_tasks", "message"}), so callers can
+pick one per request (or via Config.SOLVER_ENGINE) and A/B them.
+
+Shared vocabulary (what normalize_input() produces):
+- task "priority" is an int 1..5 ("high"/"medium"/"low" map to 5/3/1)
+- task "duration" in minutes, "mode" is "fixed" or "duration"
+- global constraints: min_start_time / max_end_time {"time": "HH:MM"},
+  disallowed_days [day names, lowercase], max_daily_duration
+  {"minutes"|"hours": n}, max_tasks_per_day {"count": n}
+- task constraints: must_morning / must_afternoon / must_evening,
+  fixed_day {"day": name}, fixed_time {"start", "end"}
+
+The legacy csp_solver vocabulary (allowed_time_range, "day", string
+priorities) is accepted as input and translated.
+
+New engines subclass SolverEngine and register with @register_engine.
+"""
+import threading
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import datetime
+
+from config import Config
+from services import csp_solver
+from services.csp_solver_v2 import CSPScheduler
+from services.solver_time import MINUTES_PER_DAY, to_label, to_minutes
+
+DEFAULT_ENGINE = "greedy"
+
+# Portfolio runs: (name, mode, ordering, seed). The first one runs in the
+# calling process; list order breaks ties, so keep the default first.
+PORTFOLIO_VARIANTS = [
+    ("priority", "greedy", "priority", 0),
+    ("deadline", "greedy", "deadline", 0),
+    ("longest", "greedy", "longest", 0),
+    ("optimal", "optimal", "priority", 0),
+    ("random-1", "greedy", "random", 1),
+    ("random-2", "greedy", "random", 2),
+    ("random-3", "greedy", "random", 3),
+]
+DEFAULT_PORTFOLIO_BUDGET_MS = 2000
+
+# Share of the budget the runs may spend placing; the rest is left for
+# finishing the current step, pickling the result and collecting it
+PORTFOLIO_RUN_SHARE = 0.8
+
+# Search time limit of mode="backtrack" when no time_budget_ms is given
+DEFAULT_BACKTRACK_LIMIT_MS = 2000
+
+_portfolio_pool = None
+_portfolio_pool_lock = threading.Lock()
+
+_PRIORITY_LEVELS = {"high": 5, "medium": 3, "low": 1}
+
+_ENGINES = {}
+
+
+def register_engine(cls):
+    """Class decorator: make an engine selectable by its name"""
+    _ENGINES[cls.name] = cls
+    return cls
+
+
+def get_engine(name=None, **options):
+    """Instantiate a registered engine; ValueError for unknown names"""
+    name = name or DEFAULT_ENGINE
+    cls = _ENGINES.get(name)
+    if cls is None:
+        raise ValueError(f"Unknown solver engine '{name}'. Available: {', '.join(available_engines())}")
+    return cls(**options)
+
+
+def available_engines():
+    return sorted(_ENGINES)
+
+
+# ==========================================================
+# NORMALIZED INPUT
+# ==========================================================
+def normalize_input(tasks, global_constraints):
+    """Translate tasks and global constraints to the shared vocabulary"""
+    return (
+        [_normalize_task(t) for t in tasks],
+        _normalize_global_constraints(global_constraints),
+    )
+
+
+def _normalize_task(task):
+    task = dict(task)
+
+    priority = task.get("priority")
+    if isinstance(priority, str):
+        task["priority"] = _PRIORITY_LEVELS.get(priority.lower(), 3)
+    elif priority is None:
+        task["priority"] = 3
+
+    if task.get("duration") is None and task.get("duration_minutes") is not None:
+        task["duration"] = task["duration_minutes"]
+
+    if not task.get("mode"):
+        task["mode"] = "fixed" if task.get("day") and task.get("start_time") else "duration"
+
+    constraints = []
+    for c in task.get("constraints") or []:
+        if c["type"] == "day":
+            value = c["value"]["day"] if isinstance(c["value"], dict) else c["value"]
+            c = {**c, "type": "fixed_day", "value": {"day": str(value).lower()}}
+        constraints.append(c)
+    task["constraints"] = constraints
+
+    return task
+
+
+def _normalize_global_constraints(global_constraints):
+    normalized = []
+    for c in global_constraints:
+        ctype = c["type"]
+        value = c["value"]
+
+        if ctype == "allowed_time_range":
+            start, end = value
+            normalized.append({**c, "type": "min_start_time", "value": {"time": start}})
+            normalized.append({**c, "type": "max_end_time", "value": {"time": end}})
+            continue
+
+        if ctype == "disallowed_days":
+            c = {**c, "value": [d.lower() for d in value]}
+
+        normalized.append(c)
+    return normalized
+
+
+# ==========================================================
+# ENGINES
+# ==========================================================
+class SolverEngine(ABC):
+    """Base class: solve(tasks, global_constraints) on normalized input"""
+
+    name = None
+
+    def __init__(self, slot_minutes=30, time_budget_ms=None, profile=False, now=None,
+                 horizon_weeks=1, start_date=None):
+        self.slot_minutes = slot_minutes
+        self.time_budget_ms = time_budget_ms
+        self.profile = profile
+        # Reference time for deadlines (None: the wall clock at solve time)
+        self.now = now
+        # 1: one week of named days; more: ISO-dated days from start_date (default: now's date)
+        self.horizon_weeks = horizon_weeks
+        self.start_date = start_date
+
+    @property
+    def grid(self):
+        """CSPScheduler keyword arguments describing the slot grid"""
+        return {
+            "slot_minutes": self.slot_minutes,
+            "horizon_weeks": self.horizon_weeks,
+            "start_date": self.start_date,
+        }
+
+    @abstractmethod
+    def solve(self, tasks, global_constraints):
+        """Result dict: {"success", "schedule", "failed_tasks", "message", ...}"""
+
+
+class _CSPSchedulerEngine(SolverEngine):
+    mode = None
+
+    def solve(self, tasks, global_constraints):
+        # mode="backtrack" bounds its search by time_limit_ms rather than time_budget_ms
+        scheduler = CSPScheduler(
+            time_limit_ms=self.time_budget_ms or DEFAULT_BACKTRACK_LIMIT_MS, now=self.now, **self.grid
+        )
+        return scheduler.solve(
+            tasks, global_constraints, mode=self.mode,
+            time_budget_ms=self.time_budget_ms, profile=self.profile
+        )
+
+
+@register_engine
+class GreedyEngine(_CSPSchedulerEngine):
+    """csp_solver_v2: best-scoring slot per task, in priority order"""
+    name = "greedy"
+    mode = "greedy"
+
+
+@register_engine
+class BacktrackEngine(_CSPSchedulerEngine):
+    """csp_solver_v2: greedy, then budgeted MRV search if anything is left over"""
+    name = "backtrack"
+    mode = "backtrack"
+
+
+@register_engine
+class AnytimeEngine(_CSPSchedulerEngine):
+    """csp_solver_v2: greedy, then local search until time_budget_ms runs out"""
+    name = "anytime"
+    mode = "anytime"
+
+
+@register_engine
+class OptimalEngine(_CSPSchedulerEngine):
+    """csp_solver_v2: max-weight task/slot assignment, kept if it beats greedy"""
+    name = "optimal"
+    mode = "optimal"
+
+
+@register_engine
+class PortfolioEngine(SolverEngine):
+    """
+    csp_solver_v2 under several orderings / heuristics (PORTFOLIO_VARIANTS)
+    at once, in worker processes; the schedule placing the most flex tasks,
+    then scoring highest, wins, earlier variants winning ties.
+
+    Every run, the local one included, gets the same wall-clock deadline,
+    PORTFOLIO_RUN_SHARE of time_budget_ms in: a run stops placing when it
+    passes it (its partial schedule still competes, "cut_short"), and a
+    run that only leaves the shared pool's queue after it returns at once.
+    Results are collected until the full budget is up, so a run that used
+    its whole share still gets back in time; runs not back by then are
+    left out ("timeout"). An abandoned solve holds pool workers for at
+    most its own budget instead of starving the next solves.
+
+    The winner depends on which runs finish within the budget: with a
+    budget the slowest variant (usually "optimal") can't meet, repeated
+    solves of the same input may pick different winners. The result's
+    "portfolio.complete" is True when every run finished in time, and
+    only then is the answer a function of the input alone.
+    """
+    name = "portfolio"
+
+    def solve(self, tasks, global_constraints):
+        budget_ms = self.time_budget_ms or DEFAULT_PORTFOLIO_BUDGET_MS
+        # Wall clock, so it means the same thing in the worker processes
+        started = time.time()
+        deadline = started + budget_ms * PORTFOLIO_RUN_SHARE / 1000.0
+        collect_until = started + budget_ms / 1000.0
+        # One reference time for every run, or they could disagree on deadlines
+        now = self.now or datetime.now()
+
+        futures = {}
+        try:
+            pool = _get_portfolio_pool()
+            for index, variant in enumerate(PORTFOLIO_VARIANTS[1:], start=1):
+                futures[index] = pool.submit(
+                    _run_variant, tasks, global_constraints, self.grid, now, variant, deadline
+                )
+        except (OSError, RuntimeError):
+            # Pool broken or unavailable: the local run still answers, and
+            # the next solve starts a fresh pool
+            _discard_portfolio_pool()
+
+        # The local run has the same deadline; it always returns something
+        outcomes = {0: _run_variant(
+            tasks, global_constraints, self.grid, now, PORTFOLIO_VARIANTS[0], deadline, self.profile
+        )}
+
+        done, _ = wait(futures.values(), timeout=max(0.0, collect_until - time.time()))
+
+        runs = [_run_summary(PORTFOLIO_VARIANTS[0], outcomes[0])]
+        for index, future in futures.items():
+            variant = PORTFOLIO_VARIANTS[index]
+            if future not in done:
+                # Not stoppable from here; the run itself gives up at the deadline
+                future.cancel()
+                runs.append({"variant": variant[0], "status": "timeout"})
+            elif future.exception() is not None:
+                runs.append({"variant": variant[0], "status": "error", "error": repr(future.exception())})
+            elif future.result() is None:
+                runs.append({"variant": variant[0], "status": "expired"})
+            else:
+                outcomes[index] = future.result()
+                runs.append(_run_summary(variant, outcomes[index]))
+
+        best = max(outcomes, key=lambda index: (outcomes[index][1], outcomes[index][2], -index))
+        result = outcomes[best][0]
+        result["portfolio"] = {
+            "winner": PORTFOLIO_VARIANTS[best][0],
+            "budget_ms": budget_ms,
+            "complete": all(run["status"] == "done" for run in runs),
+            "runs": runs,
+        }
+        return result
+
+
+def _get_portfolio_pool():
+    """Worker processes shared by every portfolio solve, started on first use"""
+    global _portfolio_pool
+    with _portfolio_pool_lock:
+        if _portfolio_pool is None:
+            _portfolio_pool = ProcessPoolExecutor(max_workers=Config.SOLVER_PORTFOLIO_WORKERS)
+        return _portfolio_pool
+
+
+def _discard_portfolio_pool():
+    global _portfolio_pool
+    with _portfolio_pool_lock:
+        if _portfolio_pool is not None:
+            _portfolio_pool.shutdown(wait=False, cancel_futures=True)
+        _portfolio_pool = None
+
+
+def _run_summary(variant, outcome):
+    result, placed, score = outcome
+    # A run cut short by the deadline is a partial answer, not a finished one
+    status = "cut_short" if result.get("deadline_reached") else "done"
+    return {"variant": variant[0], "status": status, "placed": placed, "score": score}
+
+
+def _run_variant(tasks, global_constraints, grid, now, variant, deadline=None, profile=False):
+    """
+    Worker entry point: one portfolio run -> (result, flex tasks placed,
+    score), or None if the deadline passed while it was still queued
+    """
+    if deadline is not None and time.time() >= deadline:
+        return None
+    _, mode, ordering, seed = variant
+    scheduler = CSPScheduler(now=now, ordering=ordering, seed=seed, **grid)
+    result = scheduler.solve(tasks, global_constraints, mode=mode, profile=profile, deadline=deadline)
+    placed = sum(
+        1 for entries in result["schedule"].values() for entry in entries if entry["type"] == "flex"
+    )
+    return result, placed, scheduler._flex_score()
+
+
+@register_engine
+class LegacyEngine(SolverEngine):
+    """csp_solver.generate_schedule: first fitting slot, no scoring"""
+    name = "legacy"
+
+    def solve(self, tasks, global_constraints):
+        if self.horizon_weeks != 1:
+            raise ValueError("The legacy engine only schedules a single week (horizon_weeks=1)")
+        legacy_tasks = [self._to_legacy_task(t) for t in tasks]
+        output = csp_solver.generate_schedule(
+            legacy_tasks, self._to_legacy_globals(global_constraints), slot_minutes=self.slot_minutes
+        )
+
+        kinds = {t["id"]: t["mode"] for t in tasks}
+        # Fixed tasks keep their own end (a 24:00 end went through legacy as 23:59)
+        fixed_ends = {t["id"]: to_label(to_minutes(t["end_time"])) for t in tasks if t["mode"] == "fixed"}
+        categories = {t["id"]: t.get("category") for t in tasks}
+        schedule = {day: [] for day in CSPScheduler(now=self.now).days}
+        failed = []
+        for item in output:
+            if item.get("status"):
+                failed.append({**item, "reason": "No valid time slot found that satisfies all constraints"})
+                continue
+            schedule.setdefault(item["day"], []).append({
+                "task_id": item["task_id"],
+                "name": item["name"],
+                "start": item["start"],
+                "end": fixed_ends.get(item["task_id"], item["end"]),
+                "type": "fixed" if kinds[item["task_id"]] == "fixed" else "flex",
+                "category": categories[item["task_id"]],
+            })
+
+        return {
+            "success": len(failed) == 0,
+            "schedule": schedule,
+            "failed_tasks": failed,
+            "message": "Schedule generated successfully" if len(failed) == 0
+                      else f"{len(failed)} tasks could not be scheduled"
+        }
+
+    @staticmethod
+    def _to_legacy_task(task):
+        priority = task.get("priority", 3)
+        constraints = []
+        for c in task.get("constraints", []):
+            if c["type"] == "fixed_day":
+                constraints.append({"type": "day", "value": c["value"].get("day", "").capitalize()})
+            else:
+                constraints.append(c)
+
+        duration = task.get("duration")
+        if task["mode"] == "fixed":
+            # Legacy solver has no fixed mode: pin the slot with constraints
+            start, end = to_minutes(task["start_time"]), to_minutes(task["end_time"])
+            # Legacy parses "HH:MM" with strptime and wraps past midnight: 24:00 -> 23:59
+            end = min(end, MINUTES_PER_DAY - 1)
+            duration = end - start
+            constraints.append({"type": "day", "value": (task.get("day") or "").capitalize()})
+            constraints.append({"type": "fixed_time", "value": {"start": to_label(start), "end": to_label(end)}})
+
+        return {
+            "id": task["id"],
+            "name": task["name"],
+            "duration": duration,
+            "priority": "high" if priority >= 4 else "low" if priority <= 2 else "medium",
+            "constraints": constraints,
+        }
+
+    @staticmethod
+    def _to_legacy_globals(global_constraints):
+        start, end = "00:00", "23:59"
+        legacy = []
+        for c in global_constraints:
+            if c["type"] == "min_start_time":
+                start = max(start, c["value"].get("time", start))
+            elif c["type"] == "max_end_time":
+                end = min(end, c["value"].get("time", end))
+            elif c["type"] == "disallowed_days":
+                legacy.append({**c, "value": [d.capitalize() for d in c["value"]]})
+            elif c["type"] in ("max_daily_duration", "max_tasks_per_day"):
+                legacy.append(c)
+        legacy.append({"type": "allowed_time_range", "value": [start, end]})
+        return legacy
@@ -0,0 +1,43 @@
+"""
+Minute-of-day helpers shared by the schedulers.
+
+Solvers work on integer minutes since midnight (0..1440) internally and
+only convert to "HH:MM" strings at their input/output boundary. The lookup
+tables below are built once at import time so the conversions are plain
+list/dict lookups.
+"""
+from datetime import time
+
+MINUTES_PER_DAY = 24 * 60
+
+# "00:00" .. "24:00", indexed by minute of day
+MINUTE_LABELS = ["%02d:%02d" % divmod(m, 60) for m in range(MINUTES_PER_DAY + 1)]
+
+_LABEL_TO_MINUTE = {label: m for m, label in enumerate(MINUTE_LABELS)}
+
+
+def to_minutes(value):
+    """Convert "HH:MM" / "HH:MM:SS" / datetime.time to minutes since midnight"""
+    if isinstance(value, int):
+        return value
+
+    minute = _LABEL_TO_MINUTE.get(value)
+    if minute is not None:
+        return minute
+
+    if hasattr(value, "hour"):
+        return value.hour * 60 + value.minute
+
+    parts = str(value).split(":")
+    return int(parts[0]) * 60 + int(parts[1])
+
+
+def to_label(minute):
+    """Convert minutes since midnight back to "HH:MM" """
+    return MINUTE_LABELS[minute]
+
+
+def to_time(minute):
+    """Convert minutes since midnight to datetime.time (24:00 becomes 23:59)"""
+    minute = min(minute, MINUTES_PER_DAY - 1)
+    return time(minute // 60, minute % 60)
@@ -1,5 +1,9 @@
 from core.database import SessionLocal
+from models.schedule_model import Schedule
 from models.task_model import Task
+from services import data_version
+from services.read_cache import cached_read
+from services.schedule_service import ScheduleService
 from datetime import datetime, date
 from sqlalchemy import and_
 
@@ -50,15 +54,19 @@ class TaskService:
             )
 
             session.add(new_task)
+            data_version.touch(session, new_task.user_id)
             session.commit()
             session.refresh(new_task)
 
-            return TaskService._task_to_dict(new_task)
+            result = TaskService._task_to_dict(new_task)
+            ScheduleService.repair_after_change(new_task.user_id, [new_task.id])
+            return result
 
         finally:
             session.close()
 
     @staticmethod
+    @cached_read
     def get_user_tasks(user_id):
         session = SessionLocal()
         try:
@@ -108,10 +116,13 @@ class TaskService:
             if "mode" in data and data["mode"] in ["fixed", "duration"]:
                 task.mode = data["mode"]
 
+            data_version.touch(session, task.user_id)
             session.commit()
             session.refresh(task)
 
-            return TaskService._task_to_dict(task)
+            result = TaskService._task_to_dict(task)
+            ScheduleService.repair_after_change(task.user_id, [task.id])
+            return result
 
         finally:
             session.close()
@@ -125,14 +136,21 @@ class TaskService:
             if not task:
                 return False
 
+            user_id = task.user_id
+            session.query(Schedule).filter(Schedule.task_id == task_id).delete()
             session.delete(task)
+            data_version.touch(session, user_id)
             session.commit()
+
+            # Waktu yang kosong bisa dipakai task yang belum terjadwal
+            ScheduleService.repair_after_change(user_id)
             return True
 
         finally:
             session.close()
 
     @staticmethod
+    @cached_read
     def get_fixed_tasks(user_id):
         session = SessionLocal()
         try:
@@ -145,6 +163,7 @@ class TaskService:
             session.close()
 
     @staticmethod
+    @cached_read
     def get_flex_tasks(user_id):
         session = SessionLocal()
         try: